@@ -0,0 +1,150 @@
+"""Mide la memoria de una corrida de scraping → enriquecimiento → SQLite sin navegador.
+
+Genera registros sintéticos con el tamaño de un aviso real y los pasa en lotes de 25 (una página
+de jobs) por el mismo camino que SearchService, guardando todo en un SQLite temporal. Cada modo
+corre en un intérprete nuevo:
+
+- slots: ScrapedRecord con slots, NormalizedRow directo a executemany y solo el HTML del botón
+  de postulación (el camino actual).
+- dict: la representación anterior, es decir un dict por registro en el scraper, el HTML completo
+  del detalle para clasificar la postulación, un dict normalizado y otra tupla por fila para
+  executemany.
+
+    python3 benchmarks/bench_memory.py --records 5000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+PROBE = r"""
+import json, random, resource, sys, tempfile, time, tracemalloc
+from pathlib import Path
+
+from jobson.enrichment import EnrichmentStage, classify_apply_type
+from jobson.models import NormalizedRow, ScrapedRecord, normalize_record
+from jobson.storage.sqlite_repository import ROW_COLUMNS, SQLiteRepository
+
+MODE = {mode!r}
+COUNT = {records}
+PAGE = 25
+PARAGRAPH = (
+    "We are looking for a Senior Python Developer to join our remote team. You will build data "
+    "pipelines with Airflow, Spark and dbt on AWS, and APIs with FastAPI and PostgreSQL. "
+)
+WORDS = PARAGRAPH.lower().replace(",", "").replace(".", "").split() + [
+    "kafka", "docker", "kubernetes", "terraform", "salary", "benefits", "equity", "hybrid",
+    "colombia", "mexico", "team", "product", "customers", "scale", "ownership", "mentoring",
+]
+BUTTON = '<button class="jobs-apply-button" aria-label="Easy Apply to this job">Easy Apply</button>'
+
+
+def rss_mb():
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss_kb //= 1024
+    return rss_kb / 1024
+
+
+def make_record(index, apply_html):
+    # Texto distinto por aviso (~2 KB, como una descripción real) para no agruparlos todos.
+    rng = random.Random(index)
+    content = PARAGRAPH + " ".join(rng.choice(WORDS) for _ in range(300))
+    return ScrapedRecord(
+        source_type="jobs",
+        source_id=str(index),
+        url=f"https://www.linkedin.com/jobs/view/{{index}}/",
+        scraped_at="2025-01-01T00:00:00+00:00",
+        title=f"Senior Python Developer {{index}}",
+        company=f"Company {{index % 300}}",
+        author="",
+        summary=content[:260] + "...",
+        content=content,
+        location="Bogotá, Colombia",
+        apply_type=classify_apply_type(apply_html),
+    )
+
+
+def detail_html(index):
+    # El detalle de LinkedIn pesa decenas de KB de HTML por tarjeta.
+    return "<div class='jobs-description'>" + ("<p><span>" + PARAGRAPH + "</span></p>") * 60 + BUTTON + "</div>"
+
+
+baseline = rss_mb()
+tracemalloc.start()
+started = time.perf_counter()
+stage = EnrichmentStage(workers=1)
+db_path = Path(tempfile.mkdtemp()) / "bench.db"
+repo = SQLiteRepository(db_path)
+results = []
+
+for start in range(0, COUNT, PAGE):
+    indexes = range(start, min(start + PAGE, COUNT))
+    if MODE == "slots":
+        batch = [make_record(index, BUTTON) for index in indexes]
+        stage.run(batch)
+        repo.upsert_results(batch, "python", "jobs")
+        results.extend(batch)
+    else:
+        batch = [make_record(index, detail_html(index)) for index in indexes]
+        stage.run(batch)
+        records = [record.to_json() for record in batch]
+        normalized = [normalize_record(record, "python", "jobs")._asdict() for record in batch]
+        unique_records = {{item["dedupe_key"]: item for item in normalized}}
+        rows = [tuple(item.get(column) for column in ROW_COLUMNS) for item in unique_records.values()]
+        # Mismo trabajo SQL que el otro modo (partición, inserción y grupos de casi duplicados).
+        repo.upsert_normalized([NormalizedRow._make(row) for row in rows])
+        results.extend(records)
+
+elapsed = time.perf_counter() - started
+heap_now, heap_peak = tracemalloc.get_traced_memory()
+print(json.dumps({{
+    "seconds": elapsed,
+    "baseline_rss_mb": baseline,
+    "peak_rss_mb": rss_mb(),
+    "heap_peak_mb": heap_peak / 2**20,
+    "heap_retained_mb": heap_now / 2**20,
+    "records": len(results),
+}}))
+"""
+
+
+def run_probe(mode: str, records: int) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE.format(mode=mode, records=records)],
+        cwd=ROOT_DIR,
+        env={**os.environ, "SUPABASE_URL": "", "SUPABASE_KEY": ""},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de memoria del pipeline de registros de JobsOn")
+    parser.add_argument("--records", type=int, default=5000, help="Registros sintéticos por corrida")
+    args = parser.parse_args()
+
+    # El tiempo incluye el costo de tracemalloc: sirve para comparar modos, no como absoluto.
+    print(
+        f"{'modo':<8}{'registros':>11}{'seg':>8}{'RSS base MB':>13}{'RSS pico MB':>13}"
+        f"{'heap pico MB':>14}{'heap final MB':>15}"
+    )
+    for mode in ("dict", "slots"):
+        result = run_probe(mode, max(1, args.records))
+        print(
+            f"{mode:<8}{result['records']:>11}{result['seconds']:>8.1f}"
+            f"{result['baseline_rss_mb']:>13.1f}{result['peak_rss_mb']:>13.1f}"
+            f"{result['heap_peak_mb']:>14.1f}{result['heap_retained_mb']:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
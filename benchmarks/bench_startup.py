@@ -0,0 +1,95 @@
+"""Mide el arranque en frío del visor: tiempo de import, create_app y memoria.
+
+Cada medición corre en un intérprete nuevo para que la caché de módulos no contamine el resultado.
+
+    python3 benchmarks/bench_startup.py --runs 5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+PROBE = r"""
+import json, resource, sys, time
+started = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+app_ms = None
+if {build_app}:
+    from jobson.web.app import create_app
+    create_app()
+    app_ms = (time.perf_counter() - imported) * 1000
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss_kb //= 1024
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": app_ms,
+    "peak_rss_mb": rss_kb / 1024,
+    "playwright_loaded": "playwright" in sys.modules,
+    "modules": len(sys.modules),
+}}))
+"""
+
+
+def run_probe(module: str, build_app: bool, role: str) -> dict:
+    env = {
+        **os.environ,
+        "APP_ROLE": role,
+        # SQLite local: la medición no depende de la red ni de credenciales.
+        "SUPABASE_URL": "",
+        "SUPABASE_KEY": "",
+    }
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, build_app=build_app)],
+        cwd=ROOT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples: list[dict]) -> dict:
+    summary = {
+        "import_ms": round(statistics.median(item["import_ms"] for item in samples), 1),
+        "peak_rss_mb": round(statistics.median(item["peak_rss_mb"] for item in samples), 1),
+        "playwright_loaded": samples[0]["playwright_loaded"],
+        "modules": samples[0]["modules"],
+    }
+    if samples[0]["create_app_ms"] is not None:
+        summary["create_app_ms"] = round(statistics.median(item["create_app_ms"] for item in samples), 1)
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de arranque del visor JobsOn")
+    parser.add_argument("--runs", type=int, default=5, help="Repeticiones por caso (se reporta la mediana)")
+    args = parser.parse_args()
+
+    cases = [
+        ("import jobson.web.app", "jobson.web.app", False, "viewer"),
+        ("create_app (viewer)", "jobson.web.app", True, "viewer"),
+        ("create_app (full)", "jobson.web.app", True, "full"),
+        ("import jobson.scraper.linkedin", "jobson.scraper.linkedin", False, "full"),
+    ]
+
+    print(f"{'caso':<34}{'import ms':>11}{'app ms':>9}{'RSS MB':>9}{'modulos':>9}  playwright")
+    for label, module, build_app, role in cases:
+        result = summarize([run_probe(module, build_app, role) for _ in range(max(1, args.runs))])
+        print(
+            f"{label:<34}{result['import_ms']:>11}{result.get('create_app_ms', '-'):>9}"
+            f"{result['peak_rss_mb']:>9}{result['modules']:>9}  {'sí' if result['playwright_loaded'] else 'no'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -17,14 +17,43 @@ class Settings:
     data_dir: Path
     sessions_dir: Path
     logs_dir: Path
+    checkpoints_dir: Path
     storage_state_path: Path
+    session_ttl_hours: float
+    sessions_pool_dir: Path
+    session_max_runs_per_hour: int
+    session_min_interval_seconds: float
+    scraper_rate: float
+    scraper_min_rate: float
+    scraper_max_rate: float
+    jobs_parallel_pages: int
+    enrichment_workers: int
     sqlite_path: Path
     supabase_url: str
     supabase_key: str
     supabase_table: str
+    supabase_pool_size: int
+    supabase_max_retries: int
+    supabase_backoff_seconds: float
+    supabase_gzip_min_bytes: int
     app_role: str
+    spool_enabled: bool
+    spool_path: Path
+    spool_batch_size: int
+    spool_interval_seconds: float
+    mirror_enabled: bool
+    mirror_path: Path
+    mirror_interval_seconds: float
     web_host: str
     web_port: int
+    web_workers: int
+    web_threads: int
+    web_keepalive: int
+    web_timeout: int
+    web_graceful_timeout: int
+    web_max_requests: int
+    har_mode: str
+    har_path: Path
 
 
 def load_settings() -> Settings:
@@ -39,17 +68,55 @@ def load_settings() -> Settings:
     sqlite_env = os.getenv("SQLITE_PATH", "").strip()
     sqlite_path = Path(sqlite_env) if sqlite_env else data_dir / "jobson.db"
 
+    spool_env = os.getenv("SPOOL_PATH", "").strip()
+    spool_path = Path(spool_env) if spool_env else data_dir / "spool.db"
+
+    mirror_env = os.getenv("MIRROR_PATH", "").strip()
+    mirror_path = Path(mirror_env) if mirror_env else data_dir / "mirror.db"
+
+    har_env = os.getenv("HAR_PATH", "").strip()
+    har_path = Path(har_env) if har_env else data_dir / "har" / "linkedin.har"
+
     return Settings(
         root_dir=ROOT_DIR,
         data_dir=data_dir,
         sessions_dir=sessions_dir,
         logs_dir=logs_dir,
+        checkpoints_dir=data_dir / "checkpoints",
         storage_state_path=sessions_dir / "storage_state.json",
+        session_ttl_hours=float(os.getenv("SESSION_TTL_HOURS", "6")),
+        sessions_pool_dir=sessions_dir / "pool",
+        session_max_runs_per_hour=int(os.getenv("SESSION_MAX_RUNS_PER_HOUR", "6")),
+        session_min_interval_seconds=float(os.getenv("SESSION_MIN_INTERVAL_SECONDS", "60")),
+        scraper_rate=float(os.getenv("SCRAPER_RATE", "0.5")),
+        scraper_min_rate=float(os.getenv("SCRAPER_MIN_RATE", "0.1")),
+        scraper_max_rate=float(os.getenv("SCRAPER_MAX_RATE", "2.0")),
+        jobs_parallel_pages=max(1, int(os.getenv("JOBS_PARALLEL_PAGES", "1"))),
+        enrichment_workers=max(1, int(os.getenv("ENRICHMENT_WORKERS", str(os.cpu_count() or 1)))),
         sqlite_path=sqlite_path,
         supabase_url=os.getenv("SUPABASE_URL", "").strip(),
         supabase_key=os.getenv("SUPABASE_KEY", "").strip(),
         supabase_table=os.getenv("SUPABASE_TABLE", "linkedin_results").strip() or "linkedin_results",
+        supabase_pool_size=int(os.getenv("SUPABASE_POOL_SIZE", "10")),
+        supabase_max_retries=int(os.getenv("SUPABASE_MAX_RETRIES", "4")),
+        supabase_backoff_seconds=float(os.getenv("SUPABASE_BACKOFF_SECONDS", "0.5")),
+        supabase_gzip_min_bytes=int(os.getenv("SUPABASE_GZIP_MIN_BYTES", "65536")),
         app_role=os.getenv("APP_ROLE", "full").strip().lower() or "full",
+        spool_enabled=os.getenv("SPOOL_ENABLED", "1").strip().lower() not in {"0", "false", "no"},
+        spool_path=spool_path,
+        spool_batch_size=int(os.getenv("SPOOL_BATCH_SIZE", "500")),
+        spool_interval_seconds=float(os.getenv("SPOOL_INTERVAL_SECONDS", "10")),
+        mirror_enabled=os.getenv("MIRROR_ENABLED", "1").strip().lower() not in {"0", "false", "no"},
+        mirror_path=mirror_path,
+        mirror_interval_seconds=float(os.getenv("MIRROR_INTERVAL_SECONDS", "30")),
         web_host=os.getenv("WEB_HOST", "127.0.0.1").strip() or "127.0.0.1",
         web_port=int(os.getenv("WEB_PORT", "5050")),
+        web_workers=max(1, int(os.getenv("WEB_WORKERS", str(min(4, (os.cpu_count() or 1) * 2))))),
+        web_threads=max(1, int(os.getenv("WEB_THREADS", "4"))),
+        web_keepalive=int(os.getenv("WEB_KEEPALIVE", "5")),
+        web_timeout=int(os.getenv("WEB_TIMEOUT", "120")),
+        web_graceful_timeout=int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30")),
+        web_max_requests=int(os.getenv("WEB_MAX_REQUESTS", "1000")),
+        har_mode=os.getenv("HAR_MODE", "").strip().lower(),
+        har_path=har_path,
     )
@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import logging
+import os
+import re
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+
+from jobson.models import ScrapedRecord, build_content_hash
+
+if TYPE_CHECKING:
+    from jobson.storage.base import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+ENRICHED_FIELDS = (
+    "seniority",
+    "work_mode",
+    "location",
+    "salary_min",
+    "salary_max",
+    "salary_currency",
+    "tech_tags",
+)
+
+# Cada clasificador es una sola expresión compilada con un grupo con nombre por categoría:
+# una pasada por el texto en vez de una cadena de búsquedas de subcadenas por registro.
+SENIORITY_PATTERN = re.compile(
+    r"\b(?:"
+    r"(?P<lead>director|directora|vp|vice president|head of|principal|jefe|jefa|gerente)"
+    r"|(?P<senior>senior|sr|lead|staff|l[ií]der)"
+    r"|(?P<junior>junior|jr|entry[- ]level|entry|trainee|intern|internship|pasante|practicante)"
+    r")\b",
+    re.IGNORECASE,
+)
+SENIORITY_LABELS = (("lead", "Lead/Director"), ("senior", "Senior"), ("junior", "Junior"))
+
+WORK_MODE_PATTERN = re.compile(
+    r"\b(?:"
+    r"(?P<hybrid>hybrid|h[ií]brid[oa])"
+    r"|(?P<remote>remote|remot[oa]|teletrabajo|work from home|wfh)"
+    r"|(?P<onsite>on[- ]?site|presencial|in[- ]office)"
+    r")\b",
+    re.IGNORECASE,
+)
+WORK_MODE_LABELS = (("hybrid", "Hybrid"), ("remote", "Remote"), ("onsite", "On-site"))
+
+LOCATION_PATTERN = re.compile(
+    r"\b(?:location|ubicaci[oó]n|based in|con sede en|lugar de trabajo)\s*[:\-–]?\s*"
+    r"(?P<location>[^\n|•·;.]{2,80})",
+    re.IGNORECASE,
+)
+
+APPLY_TYPE_PATTERN = re.compile(r"(?P<easy>Easy Apply|Solicitud sencilla)|(?P<external>Apply|Solicitar)")
+
+_CURRENCY = r"USD|US\$|EUR|MXN|COP|CLP|ARS|PEN|BRL|GBP|R\$|\$|€|£"
+_CURRENCY_CODE = r"USD|EUR|MXN|COP|CLP|ARS|PEN|BRL|GBP"
+_AMOUNT = r"\d{1,3}(?:[.,\s]\d{3})+|\d+(?:[.,]\d+)?\s?[kK]\b|\d{3,7}"
+_RANGE = r"\s?(?:-|–|—|a|to|hasta)\s?"
+# Los códigos no pueden empezar a mitad de palabra ("years 250" no es ARS, "Open 2025" no es PEN).
+# Un código al final manda sobre el símbolo: "$1.500.000 - $2.000.000 COP" es COP, no "$".
+SALARY_PATTERN = re.compile(
+    rf"(?<![A-Za-z])(?P<cur>{_CURRENCY})\s?(?P<min>{_AMOUNT})"
+    rf"(?:{_RANGE}(?:{_CURRENCY})?\s?(?P<max>{_AMOUNT}))?(?:\s?(?P<code>{_CURRENCY_CODE})\b)?"
+    rf"|(?P<min2>{_AMOUNT}){_RANGE}(?P<max2>{_AMOUNT})\s?(?P<cur2>{_CURRENCY_CODE})\b",
+    re.IGNORECASE,
+)
+CURRENCY_CODES = {"US$": "USD", "€": "EUR", "£": "GBP", "R$": "BRL"}
+
+# Etiqueta canónica -> alternativas. Los bordes evitan que "sql" coincida dentro de "mysql" o
+# "java" dentro de "javascript".
+TECH_TAGS = {
+    "Python": r"python",
+    "Java": r"java",
+    "JavaScript": r"javascript",
+    "TypeScript": r"typescript",
+    "Node.js": r"node\.?js",
+    "React": r"react(?:\.?js)?",
+    "Angular": r"angular",
+    "Vue": r"vue(?:\.?js)?",
+    "Go": r"golang",
+    "Rust": r"rust",
+    "C#": r"c\#",
+    "C++": r"c\+\+",
+    ".NET": r"\.net|dotnet",
+    "PHP": r"php",
+    "Ruby": r"ruby|rails",
+    "Kotlin": r"kotlin",
+    "Swift": r"swift",
+    "Scala": r"scala",
+    "SQL": r"sql",
+    "PostgreSQL": r"postgres(?:ql)?",
+    "MySQL": r"mysql",
+    "MongoDB": r"mongo(?:db)?",
+    "Redis": r"redis",
+    "Kafka": r"kafka",
+    "Spark": r"spark|pyspark",
+    "Airflow": r"airflow",
+    "dbt": r"dbt",
+    "Django": r"django",
+    "Flask": r"flask",
+    "FastAPI": r"fastapi",
+    "Spring": r"spring(?: boot)?",
+    "AWS": r"aws|amazon web services",
+    "GCP": r"gcp|google cloud",
+    "Azure": r"azure",
+    "Docker": r"docker",
+    "Kubernetes": r"kubernetes|k8s",
+    "Terraform": r"terraform",
+    "Linux": r"linux",
+    "Pandas": r"pandas",
+    "TensorFlow": r"tensorflow",
+    "PyTorch": r"pytorch",
+    "Machine Learning": r"machine learning",
+    "LLM": r"llms?",
+    "Power BI": r"power ?bi",
+    "Tableau": r"tableau",
+    "Salesforce": r"salesforce",
+    "SAP": r"sap",
+}
+TECH_GROUPS = {f"t{index}": tag for index, tag in enumerate(TECH_TAGS)}
+TECH_PATTERN = re.compile(
+    r"(?<![\w#+.])(?:"
+    + "|".join(f"(?P<{group}>{TECH_TAGS[tag]})" for group, tag in TECH_GROUPS.items())
+    + r")(?![\w#+])",
+    re.IGNORECASE,
+)
+
+
+def _record_text(record: ScrapedRecord) -> str:
+    body = record.content or record.summary or ""
+    return f"{record.title or ''}\n{body}"
+
+
+def _first_label(pattern: re.Pattern[str], labels: tuple[tuple[str, str], ...], text: str) -> str | None:
+    found = {match.lastgroup for match in pattern.finditer(text)}
+    for group, label in labels:
+        if group in found:
+            return label
+    return None
+
+
+def classify_apply_type(html_fragment: str) -> str:
+    found = {match.lastgroup for match in APPLY_TYPE_PATTERN.finditer(html_fragment or "")}
+    if "easy" in found:
+        return "Easy Apply"
+    if "external" in found:
+        return "External Apply"
+    return "Unknown"
+
+
+def _parse_amount(raw: str) -> float | None:
+    value = raw.strip().replace(" ", "")
+    multiplier = 1.0
+    if value[-1:] in {"k", "K"}:
+        multiplier = 1000.0
+        value = value[:-1].replace(",", ".")
+    elif re.fullmatch(r"\d{1,3}(?:[.,]\d{3})+", value):
+        value = re.sub(r"[.,]", "", value)
+    else:
+        value = value.replace(",", ".")
+    try:
+        return float(value) * multiplier
+    except ValueError:
+        return None
+
+
+class BaseEnricher(ABC):
+    @abstractmethod
+    def enrich(self, record: ScrapedRecord, text: str) -> None:
+        raise NotImplementedError
+
+
+class SeniorityEnricher(BaseEnricher):
+    def enrich(self, record: ScrapedRecord, text: str) -> None:
+        record.seniority = _first_label(SENIORITY_PATTERN, SENIORITY_LABELS, text) or "Mid"
+
+
+class WorkModeEnricher(BaseEnricher):
+    def enrich(self, record: ScrapedRecord, text: str) -> None:
+        record.work_mode = _first_label(WORK_MODE_PATTERN, WORK_MODE_LABELS, text) or "Unknown"
+
+
+class LocationEnricher(BaseEnricher):
+    def enrich(self, record: ScrapedRecord, text: str) -> None:
+        # La ubicación de la tarjeta (si el scraper la obtuvo) manda sobre la del texto.
+        if record.location:
+            return
+        match = LOCATION_PATTERN.search(text)
+        record.location = match.group("location").strip(" ,-") if match else None
+
+
+class SalaryEnricher(BaseEnricher):
+    def enrich(self, record: ScrapedRecord, text: str) -> None:
+        record.salary_min = record.salary_max = record.salary_currency = None
+        for match in SALARY_PATTERN.finditer(text):
+            low = _parse_amount(match.group("min") or match.group("min2"))
+            high_raw = match.group("max") or match.group("max2")
+            high = _parse_amount(high_raw) if high_raw else None
+            # Montos sueltos chicos suelen ser otra cosa ("$5 de bono", "2 a 3 años").
+            if low is None or low < 100:
+                continue
+            if high is not None and high < low:
+                high = None
+            currency = (match.group("code") or match.group("cur") or match.group("cur2") or "").upper()
+            record.salary_min = low
+            record.salary_max = high
+            record.salary_currency = CURRENCY_CODES.get(currency, currency)
+            return
+
+
+class TechTagsEnricher(BaseEnricher):
+    def enrich(self, record: ScrapedRecord, text: str) -> None:
+        tags = dict.fromkeys(TECH_GROUPS[match.lastgroup] for match in TECH_PATTERN.finditer(text))
+        record.tech_tags = ", ".join(tags) or None
+
+
+DEFAULT_ENRICHERS: tuple[BaseEnricher, ...] = (
+    SeniorityEnricher(),
+    WorkModeEnricher(),
+    LocationEnricher(),
+    SalaryEnricher(),
+    TechTagsEnricher(),
+)
+
+
+def _enrich_chunk(records: list[ScrapedRecord], enrichers: tuple[BaseEnricher, ...]) -> list[ScrapedRecord]:
+    for record in records:
+        text = _record_text(record)
+        for enricher in enrichers:
+            enricher.enrich(record, text)
+    return records
+
+
+# Etapa entre el scraper y el repositorio. Los lotes del scraping (decenas de registros) se
+# procesan en el mismo proceso; los lotes grandes de un re-enriquecimiento se reparten en un
+# pool de procesos.
+class EnrichmentStage:
+    def __init__(
+        self,
+        enrichers: tuple[BaseEnricher, ...] = DEFAULT_ENRICHERS,
+        workers: int | None = None,
+        chunk_size: int = 500,
+    ):
+        self.enrichers = enrichers
+        self.workers = (os.cpu_count() or 1) if workers is None else max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        self._executor: ProcessPoolExecutor | None = None
+
+    def run(self, records: list[ScrapedRecord]) -> list[ScrapedRecord]:
+        if self.workers < 2 or len(records) < self.chunk_size * 2:
+            return _enrich_chunk(records, self.enrichers)
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        chunks = [records[index:index + self.chunk_size] for index in range(0, len(records), self.chunk_size)]
+        enriched = self._executor.map(_enrich_chunk, chunks, [self.enrichers] * len(chunks))
+        # Los procesos devuelven copias: se vuelcan sobre los registros originales.
+        for chunk, result in zip(chunks, enriched):
+            for record, updated in zip(chunk, result):
+                for field in ENRICHED_FIELDS:
+                    setattr(record, field, getattr(updated, field))
+        return records
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def reenrich_repository(
+    repository: BaseRepository,
+    stage: EnrichmentStage,
+    batch_size: int = 2000,
+) -> dict[str, int]:
+    scanned = 0
+    changed = 0
+    for rows in repository.iter_stored(batch_size=batch_size):
+        records = stage.run([ScrapedRecord.from_json(row) for row in rows])
+
+        updates = []
+        for row, record in zip(rows, records):
+            enriched = {field: getattr(record, field) for field in ENRICHED_FIELDS}
+            if any(row.get(field) != value for field, value in enriched.items()):
+                row.update(enriched)
+                row["content_hash"] = build_content_hash(row)
+                updates.append(row)
+        if updates:
+            repository.update_enrichment(updates)
+
+        scanned += len(rows)
+        changed += len(updates)
+        logger.info("Re-enriquecidos %s registros (%s con cambios)", scanned, changed)
+    return {"scanned": scanned, "changed": changed}
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from jobson.models import CONTENT_FIELDS
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+# Sin id (entero en SQLite, uuid en Supabase) ni hashes internos: dedupe_key identifica el registro.
+EXPORT_COLUMNS = (
+    *CONTENT_FIELDS,
+    "keyword",
+    "search_mode",
+    "scraped_at",
+    "last_seen_at",
+    "dedupe_key",
+    "cluster_id",
+)
+NUMERIC_COLUMNS = {"salary_min": "float64", "salary_max": "float64", "cluster_size": "int64"}
+
+Batches = Iterable[list[dict[str, Any]]]
+
+
+def export_columns(collapse: bool = False) -> tuple[str, ...]:
+    return (*EXPORT_COLUMNS, "cluster_size") if collapse else EXPORT_COLUMNS
+
+
+# pyarrow es opcional: solo hace falta para Parquet. Se valida antes de empezar a responder
+# para que la API devuelva un error claro en vez de cortar la descarga.
+def check_format(fmt: str) -> None:
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise ValueError(f"Formato inválido. Usa {', '.join(EXPORT_MEDIA_TYPES)}.")
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as exc:
+            raise RuntimeError("Exportar a Parquet requiere pyarrow: pip install pyarrow") from exc
+
+
+def _iter_csv(batches: Batches, columns: tuple[str, ...]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _iter_jsonl(batches: Batches, columns: tuple[str, ...]) -> Iterator[bytes]:
+    for batch in batches:
+        if not batch:
+            continue
+        lines = (json.dumps({column: row.get(column) for column in columns}, ensure_ascii=False) for row in batch)
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+# Destino de ParquetWriter que entrega los bytes escritos en vez de acumularlos: tell() sigue
+# contando desde el inicio porque el footer guarda offsets absolutos de cada row group.
+class _ChunkSink(io.RawIOBase):
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _iter_parquet(batches: Batches, columns: tuple[str, ...]) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(column, NUMERIC_COLUMNS.get(column, "string")) for column in columns])
+    sink = _ChunkSink()
+    # Un row group por lote: en memoria nunca hay más de un lote de filas.
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for batch in batches:
+            if not batch:
+                continue
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            if chunk := sink.drain():
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+EXPORT_WRITERS = {"csv": _iter_csv, "jsonl": _iter_jsonl, "parquet": _iter_parquet}
+
+
+def iter_export(batches: Batches, fmt: str, collapse: bool = False) -> Iterator[bytes]:
+    check_format(fmt)
+    return EXPORT_WRITERS[fmt](batches, export_columns(collapse))
@@ -1,8 +1,121 @@
 from __future__ import annotations
 
 import hashlib
+from collections.abc import Mapping
+from dataclasses import dataclass
 from datetime import UTC, datetime
-from typing import Any
+from typing import Any, NamedTuple
+
+from jobson.similarity import record_simhash
+
+# Columnas que describen el contenido del registro; keyword/search_mode/fechas no cuentan como cambio.
+CONTENT_FIELDS = (
+    "source_type",
+    "source_id",
+    "title",
+    "company",
+    "author",
+    "summary",
+    "content",
+    "seniority",
+    "apply_type",
+    "url",
+    "work_mode",
+    "location",
+    "salary_min",
+    "salary_max",
+    "salary_currency",
+    "tech_tags",
+)
+
+
+# Campos de ScrapedRecord: lo que entrega el scraper más lo que agrega el enriquecimiento.
+RECORD_FIELDS = (
+    "source_type",
+    "source_id",
+    "title",
+    "company",
+    "author",
+    "summary",
+    "content",
+    "location",
+    "apply_type",
+    "url",
+    "scraped_at",
+    "seniority",
+    "work_mode",
+    "salary_min",
+    "salary_max",
+    "salary_currency",
+    "tech_tags",
+)
+
+
+# Registro tal como sale del scraper y pasa por el enriquecimiento. Con slots ocupa una fracción
+# de un dict por registro, y una corrida larga los mantiene todos en memoria hasta el CSV.
+@dataclass(slots=True)
+class ScrapedRecord:
+    source_type: str
+    source_id: str
+    url: str
+    scraped_at: str
+    title: str | None = None
+    company: str | None = None
+    author: str | None = None
+    summary: str | None = None
+    content: str | None = None
+    location: str | None = None
+    apply_type: str | None = None
+    seniority: str | None = None
+    work_mode: str | None = None
+    salary_min: float | None = None
+    salary_max: float | None = None
+    salary_currency: str | None = None
+    tech_tags: str | None = None
+
+    def to_json(self) -> dict[str, Any]:
+        return {name: getattr(self, name) for name in RECORD_FIELDS}
+
+    @classmethod
+    def from_json(cls, data: Mapping[str, Any]) -> ScrapedRecord:
+        return cls(**{name: data.get(name) for name in RECORD_FIELDS})
+
+
+# Fila lista para persistir, en el orden de columnas de la tabla: SQLite la pasa tal cual a
+# executemany y Supabase la convierte a dict (_asdict) solo al armar el JSON.
+class NormalizedRow(NamedTuple):
+    source_type: str
+    source_id: str | None
+    title: str | None
+    company: str | None
+    author: str | None
+    summary: str | None
+    content: str | None
+    seniority: str | None
+    apply_type: str | None
+    url: str | None
+    work_mode: str | None
+    location: str | None
+    salary_min: float | None
+    salary_max: float | None
+    salary_currency: str | None
+    tech_tags: str | None
+    keyword: str
+    search_mode: str
+    scraped_at: str
+    last_seen_at: str
+    dedupe_key: str
+    content_hash: str | None
+    simhash: int | None
+    cluster_id: str | None = None
+
+    # Filas que vienen de otra base (Supabase, spool): pueden traer columnas de más (id,
+    # created_at) o no tener las agregadas después.
+    @classmethod
+    def from_mapping(cls, data: Mapping[str, Any]) -> NormalizedRow:
+        values = {name: data.get(name) for name in cls._fields}
+        values["last_seen_at"] = values["last_seen_at"] or values["scraped_at"]
+        return cls(**values)
 
 
 def now_iso() -> str:
@@ -15,6 +128,22 @@ def _clean_text(value: Any) -> str:
     return str(value).strip()
 
 
+def _clean_number(value: Any) -> float | None:
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _hash_value(value: Any) -> str:
+    # 3000 (JSON de Supabase) y 3000.0 (SQLite) deben dar el mismo hash.
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"{float(value):.2f}"
+    return _clean_text(value)
+
+
 def build_dedupe_key(record: dict[str, Any]) -> str:
     base = "|".join(
         [
@@ -30,21 +159,39 @@ def build_dedupe_key(record: dict[str, Any]) -> str:
     return hashlib.sha1(base.encode("utf-8")).hexdigest()
 
 
-def normalize_record(record: dict[str, Any], keyword: str, search_mode: str) -> dict[str, Any]:
-    normalized = {
-        "source_type": _clean_text(record.get("source_type")),
-        "source_id": _clean_text(record.get("source_id")) or None,
-        "title": _clean_text(record.get("title")) or None,
-        "company": _clean_text(record.get("company")) or None,
-        "author": _clean_text(record.get("author")) or None,
-        "summary": _clean_text(record.get("summary")) or None,
-        "content": _clean_text(record.get("content")) or None,
-        "seniority": _clean_text(record.get("seniority")) or None,
-        "apply_type": _clean_text(record.get("apply_type")) or None,
-        "url": _clean_text(record.get("url")) or None,
-        "keyword": _clean_text(keyword),
-        "search_mode": _clean_text(search_mode),
-        "scraped_at": _clean_text(record.get("scraped_at")) or now_iso(),
+def build_content_hash(record: dict[str, Any]) -> str:
+    base = "\x1f".join(_hash_value(record.get(field)) for field in CONTENT_FIELDS)
+    return hashlib.sha1(base.encode("utf-8")).hexdigest()
+
+
+def normalize_record(record: ScrapedRecord, keyword: str, search_mode: str) -> NormalizedRow:
+    # En el orden de CONTENT_FIELDS, que es también el de las primeras columnas de NormalizedRow.
+    content = {
+        "source_type": _clean_text(record.source_type),
+        "source_id": _clean_text(record.source_id) or None,
+        "title": _clean_text(record.title) or None,
+        "company": _clean_text(record.company) or None,
+        "author": _clean_text(record.author) or None,
+        "summary": _clean_text(record.summary) or None,
+        "content": _clean_text(record.content) or None,
+        "seniority": _clean_text(record.seniority) or None,
+        "apply_type": _clean_text(record.apply_type) or None,
+        "url": _clean_text(record.url) or None,
+        "work_mode": _clean_text(record.work_mode) or None,
+        "location": _clean_text(record.location) or None,
+        "salary_min": _clean_number(record.salary_min),
+        "salary_max": _clean_number(record.salary_max),
+        "salary_currency": _clean_text(record.salary_currency) or None,
+        "tech_tags": _clean_text(record.tech_tags) or None,
     }
-    normalized["dedupe_key"] = build_dedupe_key(normalized)
-    return normalized
+    scraped_at = _clean_text(record.scraped_at) or now_iso()
+    return NormalizedRow(
+        *content.values(),
+        keyword=_clean_text(keyword),
+        search_mode=_clean_text(search_mode),
+        scraped_at=scraped_at,
+        last_seen_at=scraped_at,
+        dedupe_key=build_dedupe_key(content),
+        content_hash=build_content_hash(content),
+        simhash=record_simhash(content),
+    )
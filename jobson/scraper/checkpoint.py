@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+from pathlib import Path
+
+from jobson.models import ScrapedRecord, now_iso
+
+logger = logging.getLogger(__name__)
+
+
+# Estado de una búsqueda en curso (ids vistos, profundidad alcanzada, cuántos registros van y
+# los que aún no se confirmaron guardados), escrito en data/checkpoints/ tras cada ronda con
+# resultados nuevos para poder reanudar una corrida larga que se cayó a mitad de camino.
+class ScrapeCheckpoint:
+    def __init__(self, checkpoint_dir: Path, kind: str, keywords: str, antiquity_days: int | None):
+        self.kind = kind
+        self.keywords = keywords
+        self.antiquity_days = antiquity_days
+
+        # El límite no forma parte de la clave: se puede reanudar pidiendo más resultados.
+        key = json.dumps([kind, keywords.strip().lower(), antiquity_days])
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+        slug = re.sub(r"[^a-z0-9]+", "_", keywords.lower()).strip("_")[:40] or "search"
+        checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        self.path = checkpoint_dir / f"{kind}_{slug}_{digest}.json"
+
+        self.seen_ids: set[str] = set()
+        self.pending: list[ScrapedRecord] = []
+        self.collected = 0
+        self.depth = 0
+        # Solo cuando la búsqueda se quedó sin resultados: llegar al límite no cierra el checkpoint,
+        # así se puede reanudar con un --limit mayor.
+        self.complete = False
+        # Lotes entregados a on_batch con la subida que los confirma (None: no hay quién los guarde).
+        self._batches: list[tuple[list[ScrapedRecord], asyncio.Future | None]] = []
+
+    def load(self) -> bool:
+        try:
+            state = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+
+        self.seen_ids = set(state.get("seen_ids", []))
+        # Los checkpoints anteriores guardaban todo lo reunido en "results".
+        saved = state.get("pending", state.get("results", []))
+        self.pending = [ScrapedRecord.from_json(item) for item in saved]
+        self.collected = int(state.get("collected", len(self.pending)))
+        self.depth = int(state.get("depth", 0))
+        self.complete = bool(state.get("complete", False))
+        logger.info(
+            "Reanudando %s '%s' desde checkpoint: %s registros (%s sin guardar), profundidad %s",
+            self.kind,
+            self.keywords,
+            self.collected,
+            len(self.pending),
+            self.depth,
+        )
+        return True
+
+    def track(self, records: list[ScrapedRecord], upload: asyncio.Future | None) -> None:
+        self._batches.append((records, upload))
+
+    def _unpersisted(self) -> list[ScrapedRecord]:
+        # Un lote sale del checkpoint cuando su subida terminó bien. Así cada guardado escribe solo
+        # lo que sigue en vuelo (o falló), no todo lo reunido desde el inicio de la corrida.
+        self._batches = [
+            (records, upload)
+            for records, upload in self._batches
+            if upload is None or not upload.done() or upload.cancelled() or upload.exception() is not None
+        ]
+        return [record for records, _ in self._batches for record in records]
+
+    # Espera las subidas en vuelo y dice si todas terminaron bien. Los lotes sin subida (sin
+    # on_batch) se entregan a quien llamó al volver el scraper, así que no cuentan.
+    async def settle(self) -> bool:
+        uploads = [upload for _, upload in self._batches if upload is not None]
+        if uploads:
+            await asyncio.wait(uploads)
+        return all(not upload.cancelled() and upload.exception() is None for upload in uploads)
+
+    def save(self, seen_ids: set[str], collected: int, depth: int, complete: bool = False) -> None:
+        self.seen_ids = seen_ids
+        self.pending = self._unpersisted()
+        self.collected = collected
+        self.depth = depth
+        self.complete = complete
+        payload = {
+            "kind": self.kind,
+            "keywords": self.keywords,
+            "antiquity_days": self.antiquity_days,
+            "updated_at": now_iso(),
+            "depth": depth,
+            "complete": complete,
+            "collected": collected,
+            "seen_ids": sorted(seen_ids),
+            "pending": [record.to_json() for record in self.pending],
+        }
+        # Escritura atómica: una caída a mitad de escritura no debe dejar un checkpoint corrupto.
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
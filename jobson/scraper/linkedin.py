@@ -1,25 +1,225 @@
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
 import re
+import time
+from collections.abc import Awaitable, Callable
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
-from urllib.parse import quote_plus
+from urllib.parse import parse_qs, quote_plus, urlparse
 
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from playwright.async_api import async_playwright
 
+from jobson.enrichment import classify_apply_type
+from jobson.models import ScrapedRecord
+from jobson.scraper.checkpoint import ScrapeCheckpoint
+from jobson.scraper.ratelimit import AdaptiveRateLimiter
+from jobson.scraper.sessions import SessionUnavailableError
+
 logger = logging.getLogger(__name__)
 
+# on_batch puede devolver la tarea que guarda el lote: el checkpoint lo conserva hasta que termine bien.
+BatchCallback = Callable[[list[ScrapedRecord]], Awaitable[asyncio.Future | None]]
+
+
+HAR_MODES = {"record", "replay"}
+# Cookie de sesión de LinkedIn: si venció, la sesión guardada ya no sirve aunque el archivo exista.
+SESSION_COOKIE = "li_at"
+
+JOBS_SCROLL_SCRIPT = """
+() => {
+    const list = document.querySelector('.jobs-search-results-list') ||
+                 document.querySelector('.jobs-search-results-list__list');
+    if (list) {
+        list.scrollBy(0, 1200);
+    } else {
+        window.scrollBy(0, 1200);
+    }
+}
+"""
+FEED_SCROLL_SCRIPT = "window.scrollBy(0, 1100)"
+JOBS_CARD_SELECTOR = ".job-card-container, .jobs-search-results__list-item, .jobs-search-results-list__list-item"
+JOBS_DETAIL_SELECTOR = ".jobs-search__job-details, .jobs-description-content, .jobs-details__main-content"
+FEED_CARD_SELECTOR = ".feed-shared-update-v2, .search-content-entity-lockup, .search-results-container [data-urn]"
+# Barra de navegación (con sesión) o formulario de login (sin ella): la página ya se puede revisar.
+LOGIN_PROBE_SELECTOR = ".global-nav, input#username, input[name='session_key']"
+# El panel de detalle corresponde a la tarjeta clicada cuando la referencia por id, o cuando la
+# URL ya apunta a ese id y su texto cambió respecto al de antes del clic.
+DETAIL_READY_SCRIPT = """
+([selector, jobId]) => {
+    const detail = document.querySelector(selector);
+    const text = detail ? detail.innerText.trim() : "";
+    if (!text) return false;
+    if (detail.querySelector(`[data-job-id="${jobId}"], a[href*="/jobs/view/${jobId}"]`)) return true;
+    const current = new URL(location.href).searchParams.get("currentJobId");
+    return current === jobId && text !== window.__jobsonPreviousDetail;
+}
+"""
+CARD_COUNT_SCRIPT = "([selector, count]) => document.querySelectorAll(selector).length > count"
+# Esperas de contenido, aparte del ritmo del rate limiter: acquire() puede volver de inmediato
+# con tokens acumulados y el DOM todavía no cambió.
+READY_TIMEOUT_MS = 10000
+DETAIL_TIMEOUT_MS = 8000
+SCROLL_TIMEOUT_MS = 4000
+APPLY_BUTTON_SELECTOR = ".jobs-apply-button, .jobs-s-apply button, button[aria-label*='Apply'], button[aria-label*='Solicit']"
+# LinkedIn muestra 25 ofertas por página y no sirve resultados más allá de start=975.
+JOBS_PAGE_SIZE = 25
+JOBS_MAX_START = 1000
+
 
 class LinkedInScraper:
-    def __init__(self, session_path: Path):
+    def __init__(
+        self,
+        session_path: Path,
+        har_mode: str | None = None,
+        har_path: Path | None = None,
+        session_ttl_seconds: float = 6 * 3600,
+        interactive_login: bool = True,
+        rate_limiter: AdaptiveRateLimiter | None = None,
+        checkpoint_dir: Path | None = None,
+        parallel_pages: int = 1,
+    ):
         self.session_path = session_path
         self.session_path.parent.mkdir(parents=True, exist_ok=True)
+        self.session_status_path = session_path.with_name(f"{session_path.stem}.status.json")
+        self.session_ttl_seconds = session_ttl_seconds
+        # Las cuentas del pool corren headless en paralelo: sin sesión válida se reporta el error
+        # (para ponerlas en cuarentena) en vez de abrir un navegador para login manual.
+        self.interactive_login = interactive_login
         self.base_url = "https://www.linkedin.com"
 
+        har_mode = (har_mode or "").strip().lower() or None
+        if har_mode and har_mode not in HAR_MODES:
+            raise ValueError("HAR_MODE inválido. Usa record o replay.")
+        if har_mode and not har_path:
+            raise ValueError("Debes indicar HAR_PATH para usar HAR_MODE.")
+        self.har_mode = har_mode
+        self.har_path = har_path
+        if self.har_path:
+            self.har_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Toda navegación, scroll y clic pasa por el limitador; en replay las respuestas salen
+        # del HAR y esperar solo alarga la corrida.
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        if self.replaying:
+            self.rate_limiter.enabled = False
+        self.checkpoint_dir = checkpoint_dir
+        self.parallel_pages = max(1, parallel_pages)
+
+    @property
+    def replaying(self) -> bool:
+        return self.har_mode == "replay"
+
+    def _har_file(self, kind: str) -> Path:
+        # Un archivo por tipo de búsqueda: en modo mixed jobs y feed abren navegadores distintos
+        # y el segundo sobrescribiría el HAR del primero al cerrar su contexto.
+        har_path = self.har_path or Path("linkedin.har")
+        return har_path.with_name(f"{har_path.stem}_{kind}{har_path.suffix or '.har'}")
+
+    def _context_options(self, kind: str) -> dict[str, Any]:
+        if self.har_mode != "record":
+            return {}
+        return {
+            "record_har_path": str(self._har_file(kind)),
+            "record_har_content": "embed",
+            "record_har_mode": "full",
+        }
+
+    def _watch_page(self, page) -> None:
+        page.on("response", self._on_response)
+
+    def _on_response(self, response) -> None:
+        if "linkedin.com" in response.url:
+            self.rate_limiter.observe_status(response.status, response.url)
+
+    async def _goto(self, page, url: str, ready_selector: str | None = None):
+        await self.rate_limiter.acquire("navigate")
+        started = time.monotonic()
+        response = await page.goto(url, wait_until="load", timeout=60000)
+        self.rate_limiter.observe_latency("navigate", time.monotonic() - started)
+        if ready_selector:
+            # Una búsqueda sin resultados nunca muestra la lista: se sigue tras el timeout.
+            try:
+                await page.locator(ready_selector).first.wait_for(state="visible", timeout=READY_TIMEOUT_MS)
+            except PlaywrightTimeoutError:
+                pass
+        return response
+
+    async def _scroll(self, page, script: str, card_selector: str | None = None) -> None:
+        await self.rate_limiter.acquire("scroll")
+        count = await page.locator(card_selector).count() if card_selector else 0
+        await page.evaluate(script)
+        if card_selector:
+            # La carga perezosa tarda: se espera a que aparezcan tarjetas nuevas (o al timeout
+            # si ya no quedan) antes de volver a contarlas.
+            try:
+                await page.wait_for_function(CARD_COUNT_SCRIPT, arg=[card_selector, count], timeout=SCROLL_TIMEOUT_MS)
+            except PlaywrightTimeoutError:
+                pass
+
+    async def _click(self, element) -> None:
+        await self.rate_limiter.acquire("click")
+        started = time.monotonic()
+        await element.click(timeout=2000)
+        self.rate_limiter.observe_latency("click", time.monotonic() - started)
+
+    async def _open_job_detail(self, page, card, job_id: str):
+        # Sin esta espera, inner_text() puede leer el detalle de la tarjeta anterior y guardarlo
+        # como contenido, seniority y postulación de la nueva.
+        await page.evaluate(
+            "selector => { window.__jobsonPreviousDetail = document.querySelector(selector)?.innerText.trim() || ''; }",
+            JOBS_DETAIL_SELECTOR,
+        )
+        await self._click(card)
+        try:
+            await page.wait_for_function(DETAIL_READY_SCRIPT, arg=[JOBS_DETAIL_SELECTOR, job_id], timeout=DETAIL_TIMEOUT_MS)
+        except PlaywrightTimeoutError:
+            # Pasado el timeout, un detalle con el mismo texto y la URL en este id es la misma oferta
+            # (LinkedIn ya la mostraba); en cualquier otro caso el panel sigue desactualizado.
+            if parse_qs(urlparse(page.url).query).get("currentJobId") != [job_id]:
+                return None
+        return page.locator(JOBS_DETAIL_SELECTOR).first
+
+    def _session_cookie_valid(self) -> bool:
+        try:
+            state = json.loads(self.session_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+        for cookie in state.get("cookies", []):
+            if cookie.get("name") == SESSION_COOKIE and "linkedin.com" in cookie.get("domain", ""):
+                expires = cookie.get("expires", -1)
+                return expires == -1 or expires > time.time()
+        return False
+
+    def _session_is_fresh(self) -> bool:
+        # La sesión se da por válida sin navegar si se validó (sonda, login o scraping exitoso)
+        # hace menos del TTL y la cookie li_at del storage_state no ha vencido.
+        if self.session_ttl_seconds <= 0 or not self.session_path.exists():
+            return False
+        try:
+            status = json.loads(self.session_status_path.read_text(encoding="utf-8"))
+            validated_at = float(status.get("validated_at", 0))
+        except (OSError, ValueError, TypeError):
+            return False
+        if time.time() - validated_at > self.session_ttl_seconds:
+            return False
+        return self._session_cookie_valid()
+
+    def _mark_session_valid(self) -> None:
+        if self.replaying:
+            return
+        self.session_status_path.write_text(
+            json.dumps({"validated_at": time.time(), "validated_at_iso": datetime.now(UTC).isoformat()}),
+            encoding="utf-8",
+        )
+
+    def _invalidate_session(self) -> None:
+        self.session_status_path.unlink(missing_ok=True)
+
     async def _is_logged_in(self, page) -> bool:
         current_url = page.url.lower()
         if "login" in current_url or "checkpoint" in current_url:
@@ -48,45 +248,140 @@ class LinkedInScraper:
 
         raise RuntimeError("No se detectó login manual dentro del tiempo esperado.")
 
-    async def _get_authenticated_page(self):
+    async def _get_replay_page(self, kind: str):
+        har_file = self._har_file(kind)
+        if not har_file.exists():
+            raise RuntimeError(f"No existe el HAR para replay: {har_file}")
+
+        playwright = await async_playwright().start()
+        logger.info("Reproduciendo tráfico LinkedIn desde %s", har_file)
+        browser = await playwright.chromium.launch(headless=True)
+        context = await browser.new_context()
+        await context.route_from_har(str(har_file), not_found="abort")
+        page = await context.new_page()
+        self._watch_page(page)
+        return playwright, browser, context, page
+
+    async def _get_authenticated_page(self, kind: str, probe: bool = True):
+        if self.replaying:
+            return await self._get_replay_page(kind)
+
         playwright = await async_playwright().start()
         storage_state = str(self.session_path) if self.session_path.exists() else None
         headless = bool(storage_state)
 
         logger.info("Iniciando navegador LinkedIn (headless=%s)", headless)
         browser = await playwright.chromium.launch(headless=headless)
-        context = await browser.new_context(storage_state=storage_state)
+        context = await browser.new_context(storage_state=storage_state, **self._context_options(kind))
         page = await context.new_page()
+        self._watch_page(page)
+
+        if storage_state and not probe:
+            return playwright, browser, context, page
 
-        await page.goto(f"{self.base_url}/jobs/", wait_until="load", timeout=60000)
+        await self._goto(page, f"{self.base_url}/jobs/", LOGIN_PROBE_SELECTOR)
         if await self._is_logged_in(page):
+            self._mark_session_valid()
             return playwright, browser, context, page
 
+        if not self.interactive_login:
+            checkpoint = "checkpoint" in page.url.lower()
+            await self._close(playwright, browser, context)
+            raise SessionUnavailableError(
+                f"Sesión {self.session_path.stem} no válida ({'checkpoint' if checkpoint else 'sin login'})",
+                checkpoint=checkpoint,
+            )
+
         logger.info("Sesion no válida. Reabriendo navegador para login manual.")
+        await context.close()
         await browser.close()
         browser = await playwright.chromium.launch(headless=False)
-        context = await browser.new_context()
+        context = await browser.new_context(**self._context_options(kind))
         page = await context.new_page()
-        await page.goto(f"{self.base_url}/login", wait_until="load", timeout=60000)
+        self._watch_page(page)
+        await self._goto(page, f"{self.base_url}/login")
         await self._wait_for_manual_login(context, page)
+        self._mark_session_valid()
+        return playwright, browser, context, page
+
+    async def login(self) -> None:
+        playwright, browser, context, _ = await self._get_authenticated_page("login")
+        await self._close(playwright, browser, context)
+
+    async def _close(self, playwright, browser, context) -> None:
+        # Cerrar el contexto antes que el navegador es lo que escribe el HAR en modo record.
+        await context.close()
+        await browser.close()
+        await playwright.stop()
+
+    async def _open_search(self, kind: str, search_url: str):
+        ready_selector = JOBS_CARD_SELECTOR if kind == "jobs" else FEED_CARD_SELECTOR
+        # Con la sesión fresca se omite la sonda a /jobs/ y el logout se detecta en la primera
+        # navegación real; solo entonces se valida/pide login y se repite la navegación.
+        fresh = self._session_is_fresh()
+        playwright, browser, context, page = await self._get_authenticated_page(kind, probe=not fresh)
+        try:
+            await self._goto(page, search_url, ready_selector)
+            if not fresh or self.replaying or await self._is_logged_in(page):
+                return playwright, browser, context, page
+        except Exception:
+            await self._close(playwright, browser, context)
+            raise
+
+        logger.info("La sesión guardada caducó; se valida de nuevo antes de buscar.")
+        self._invalidate_session()
+        await self._close(playwright, browser, context)
+
+        playwright, browser, context, page = await self._get_authenticated_page(kind, probe=True)
+        try:
+            await self._goto(page, search_url, ready_selector)
+        except Exception:
+            await self._close(playwright, browser, context)
+            raise
         return playwright, browser, context, page
 
-    def _estimate_seniority(self, title: str, description: str) -> str:
-        text = f"{title} {description}".lower()
-        if any(word in text for word in ["director", "vp", "vice president", "head of", "principal"]):
-            return "Lead/Director"
-        if any(word in text for word in ["senior", "sr", "lead", "staff"]):
-            return "Senior"
-        if any(word in text for word in ["junior", "jr", "entry", "trainee", "intern", "pasante"]):
-            return "Junior"
-        return "Mid"
-
-    def _detect_apply_type(self, html_fragment: str) -> str:
-        if "Easy Apply" in html_fragment or "Solicitud sencilla" in html_fragment:
-            return "Easy Apply"
-        if "Apply" in html_fragment or "Solicitar" in html_fragment:
-            return "External Apply"
-        return "Unknown"
+    def _start_checkpoint(
+        self, kind: str, keywords: str, antiquity_days: int | None, resume: bool
+    ) -> ScrapeCheckpoint | None:
+        # En replay la corrida es barata y reproducible: no vale la pena guardar checkpoints.
+        if not self.checkpoint_dir or self.replaying:
+            return None
+        checkpoint = ScrapeCheckpoint(self.checkpoint_dir, kind, keywords, antiquity_days)
+        if resume and checkpoint.load():
+            return checkpoint
+        if resume:
+            logger.info("No hay checkpoint de %s '%s'; se empieza desde cero.", kind, keywords)
+        checkpoint.clear()
+        return checkpoint
+
+    # El archivo se borra recién cuando todas las subidas del checkpoint terminaron bien: si alguna
+    # falla, sus registros quedan en "pending" para reanudar.
+    async def _finish_checkpoint(
+        self,
+        checkpoint: ScrapeCheckpoint | None,
+        seen_ids: set[str],
+        collected: int,
+        depth: int,
+        keep: bool,
+        complete: bool,
+    ) -> None:
+        if checkpoint is None:
+            return
+        if await checkpoint.settle() and not keep:
+            checkpoint.clear()
+        else:
+            checkpoint.save(seen_ids, collected, depth, complete=complete)
+
+    async def _emit_batch(
+        self,
+        checkpoint: ScrapeCheckpoint | None,
+        on_batch: BatchCallback | None,
+        records: list[ScrapedRecord],
+    ) -> None:
+        upload = await on_batch(records) if on_batch else None
+        # Sin on_batch nadie guarda los registros: siguen en el checkpoint hasta terminar.
+        if checkpoint and (upload is not None or on_batch is None):
+            checkpoint.track(records, upload)
 
     async def _first_visible_text(self, card, selectors: list[str]) -> str:
         for selector in selectors:
@@ -110,173 +405,295 @@ class LinkedInScraper:
         match = re.search(r"/jobs/view/(\d+)", url)
         return match.group(1) if match else ""
 
-    async def scrape_jobs(self, keywords: str, limit: int, antiquity_days: int | None = None) -> list[dict[str, Any]]:
-        playwright, browser, _, page = await self._get_authenticated_page()
-        results: list[dict[str, Any]] = []
-        seen_ids: set[str] = set()
-
+    async def _collect_job_cards(self, page) -> list:
+        # La lista de cada página carga perezosamente: se desplaza hasta que el número de
+        # tarjetas deja de crecer o ya están las 25 de la página.
+        cards: list = []
+        for _ in range(6):
+            found = await page.locator(JOBS_CARD_SELECTOR).all()
+            if cards and len(found) == len(cards):
+                break
+            cards = found
+            if len(cards) >= JOBS_PAGE_SIZE:
+                break
+            await self._scroll(page, JOBS_SCROLL_SCRIPT, JOBS_CARD_SELECTOR)
+        return cards
+
+    async def _parse_job_card(self, page, card, seen_ids: set[str]) -> ScrapedRecord | None:
         try:
-            tpr = ""
-            if antiquity_days:
-                if antiquity_days <= 1:
-                    tpr = "&f_TPR=r86400"
-                elif antiquity_days <= 7:
-                    tpr = "&f_TPR=r604800"
-                else:
-                    tpr = "&f_TPR=r2592000"
-
-            search_url = f"{self.base_url}/jobs/search/?keywords={quote_plus(keywords)}{tpr}"
-            logger.info("Buscando jobs: %s", search_url)
-            await page.goto(search_url, wait_until="load", timeout=60000)
-            await asyncio.sleep(4)
-
-            no_new_rounds = 0
-            while len(results) < limit and no_new_rounds <= 8:
-                cards = await page.locator(
-                    ".job-card-container, .jobs-search-results__list-item, .jobs-search-results-list__list-item"
-                ).all()
-
-                if not cards:
-                    no_new_rounds += 1
-                    await page.evaluate("window.scrollBy(0, 900)")
-                    await asyncio.sleep(2)
-                    continue
-
-                before = len(results)
-                for card in cards:
-                    if len(results) >= limit:
-                        break
+            raw_id = await card.get_attribute("data-job-id")
+            if not raw_id:
+                raw_id = await card.get_attribute("data-entity-urn")
 
-                    try:
-                        raw_id = await card.get_attribute("data-job-id")
-                        if not raw_id:
-                            raw_id = await card.get_attribute("data-entity-urn")
+            card_link = ""
+            try:
+                href = await card.locator("a[href*='/jobs/view/']").first.get_attribute("href")
+                if href:
+                    card_link = href if href.startswith("http") else f"{self.base_url}{href}"
+            except Exception:
+                card_link = ""
+
+            job_id = self._extract_job_id(raw_id, card_link)
+            if not job_id or job_id in seen_ids:
+                return None
+            seen_ids.add(job_id)
+
+            title = await self._first_visible_text(
+                card,
+                [
+                    ".job-card-list__title",
+                    ".base-search-card__title",
+                    ".artdeco-entity-lockup__title",
+                    "h3",
+                    "h4",
+                ],
+            )
 
-                        card_link = ""
-                        try:
-                            href = await card.locator("a[href*='/jobs/view/']").first.get_attribute("href")
-                            if href:
-                                card_link = href if href.startswith("http") else f"{self.base_url}{href}"
-                        except Exception:
-                            card_link = ""
+            company = await self._first_visible_text(
+                card,
+                [
+                    ".job-card-container__primary-description",
+                    ".job-card-container__company-name",
+                    ".base-search-card__subtitle",
+                    ".artdeco-entity-lockup__subtitle",
+                ],
+            )
 
-                        job_id = self._extract_job_id(raw_id, card_link)
-                        if not job_id or job_id in seen_ids:
-                            continue
-                        seen_ids.add(job_id)
+            location = await self._first_visible_text(
+                card,
+                [
+                    ".job-card-container__metadata-item",
+                    ".job-search-card__location",
+                    ".artdeco-entity-lockup__caption",
+                ],
+            )
 
-                        title = await self._first_visible_text(
-                            card,
-                            [
-                                ".job-card-list__title",
-                                ".base-search-card__title",
-                                ".artdeco-entity-lockup__title",
-                                "h3",
-                                "h4",
-                            ],
-                        )
+            detail_text = ""
+            apply_type = "Unknown"
+            try:
+                detail = await self._open_job_detail(page, card, job_id)
+                if detail is not None and await detail.is_visible(timeout=3000):
+                    detail_text = (await detail.inner_text(timeout=4000)).strip()
+                    apply_type = await self._detect_apply_type(detail)
+            except Exception:
+                pass
+
+            full_url = card_link or f"{self.base_url}/jobs/view/{job_id}/"
+            summary = (detail_text[:260] + "...") if len(detail_text) > 260 else detail_text
+
+            return ScrapedRecord(
+                source_type="jobs",
+                source_id=job_id,
+                url=full_url,
+                scraped_at=datetime.now(UTC).isoformat(),
+                title=title or "Sin título",
+                company=company or "Sin empresa",
+                author="",
+                summary=summary,
+                content=detail_text,
+                location=location,
+                apply_type=apply_type,
+            )
+        except Exception:
+            return None
 
-                        company = await self._first_visible_text(
-                            card,
-                            [
-                                ".job-card-container__primary-description",
-                                ".job-card-container__company-name",
-                                ".base-search-card__subtitle",
-                                ".artdeco-entity-lockup__subtitle",
-                            ],
-                        )
+    async def _detect_apply_type(self, detail) -> str:
+        # Basta el HTML del botón de postulación (con su aria-label), no el del detalle completo;
+        # solo si no aparece se revisa el detalle, y el HTML se descarta apenas se clasifica.
+        try:
+            button = detail.locator(APPLY_BUTTON_SELECTOR).first
+            if await button.count():
+                return classify_apply_type(await button.evaluate("element => element.outerHTML", timeout=2000))
+        except Exception:
+            pass
+        return classify_apply_type(await detail.inner_html(timeout=4000))
+
+    async def _scrape_jobs_page(
+        self,
+        page,
+        page_url: str,
+        seen_ids: set[str],
+        remaining: int,
+        navigate: bool = True,
+    ) -> tuple[list[ScrapedRecord], int, bool]:
+        if navigate:
+            await self._goto(page, page_url, JOBS_CARD_SELECTOR)
+        cards = await self._collect_job_cards(page)
+
+        records: list[ScrapedRecord] = []
+        for card in cards:
+            if len(records) >= remaining:
+                # Tarjetas sin revisar: la página no quedó completa.
+                return records, len(cards), False
+            record = await self._parse_job_card(page, card, seen_ids)
+            if record:
+                records.append(record)
+        return records, len(cards), True
+
+    async def scrape_jobs(
+        self,
+        keywords: str,
+        limit: int,
+        antiquity_days: int | None = None,
+        on_batch: BatchCallback | None = None,
+        resume: bool = False,
+        keep_checkpoint: bool = False,
+    ) -> list[ScrapedRecord]:
+        checkpoint = self._start_checkpoint("jobs", keywords, antiquity_days, resume)
+        seen_ids: set[str] = set(checkpoint.seen_ids) if checkpoint else set()
+        # En jobs la profundidad del checkpoint es el offset (&start=N) de la próxima página.
+        offset = checkpoint.depth if checkpoint else 0
+        # Lo guardado en corridas anteriores cuenta para el límite pero no vuelve a la lista.
+        already_saved = checkpoint.collected - len(checkpoint.pending) if checkpoint else 0
+        limit -= already_saved
+        results: list[ScrapedRecord] = list(checkpoint.pending) if checkpoint else []
+
+        if results:
+            # Lo reunido antes de la caída pudo no alcanzar a guardarse; el upsert es idempotente.
+            await self._emit_batch(checkpoint, on_batch, list(results))
+        if checkpoint and (checkpoint.complete or len(results) >= limit):
+            await self._finish_checkpoint(
+                checkpoint, seen_ids, already_saved + len(results), offset, keep_checkpoint, checkpoint.complete
+            )
+            return results
 
-                        detail_text = ""
-                        detail_html = ""
-                        try:
-                            await card.click(timeout=2000)
-                            await asyncio.sleep(1.4)
-                            detail = page.locator(
-                                ".jobs-search__job-details, .jobs-description-content, .jobs-details__main-content"
-                            ).first
-                            if await detail.is_visible(timeout=3000):
-                                detail_text = (await detail.inner_text(timeout=4000)).strip()
-                                detail_html = await detail.inner_html(timeout=4000)
-                        except Exception:
-                            pass
+        tpr = ""
+        if antiquity_days:
+            if antiquity_days <= 1:
+                tpr = "&f_TPR=r86400"
+            elif antiquity_days <= 7:
+                tpr = "&f_TPR=r604800"
+            else:
+                tpr = "&f_TPR=r2592000"
 
-                        full_url = card_link or f"{self.base_url}/jobs/view/{job_id}/"
-                        summary = (detail_text[:260] + "...") if len(detail_text) > 260 else detail_text
+        search_url = f"{self.base_url}/jobs/search/?keywords={quote_plus(keywords)}{tpr}"
+        logger.info("Buscando jobs: %s (desde start=%s, %s pestañas)", search_url, offset, self.parallel_pages)
+        playwright, browser, context, page = await self._open_search("jobs", f"{search_url}&start={offset}")
 
-                        results.append(
-                            {
-                                "source_type": "jobs",
-                                "source_id": job_id,
-                                "title": title or "Sin título",
-                                "company": company or "Sin empresa",
-                                "author": "",
-                                "summary": summary,
-                                "content": detail_text,
-                                "seniority": self._estimate_seniority(title, detail_text),
-                                "apply_type": self._detect_apply_type(detail_html),
-                                "url": full_url,
-                                "scraped_at": datetime.now(UTC).isoformat(),
-                            }
+        try:
+            # Se piden las páginas de resultados por offset en vez de hacer scroll infinito:
+            # cada página trae solo sus 25 tarjetas, así el costo por registro no crece con la
+            # profundidad. Con varias pestañas se procesa una "ola" de páginas en paralelo.
+            tabs = [page]
+            for _ in range(self.parallel_pages - 1):
+                tab = await context.new_page()
+                self._watch_page(tab)
+                tabs.append(tab)
+
+            first_wave = True
+            empty_waves = 0
+            while len(results) < limit and offset < JOBS_MAX_START and empty_waves < 2:
+                # Solo se abren tantas páginas como hagan falta para completar el límite.
+                pages_needed = min(len(tabs), -(-(limit - len(results)) // JOBS_PAGE_SIZE))
+                starts = [
+                    start
+                    for start in range(offset, offset + JOBS_PAGE_SIZE * pages_needed, JOBS_PAGE_SIZE)
+                    if start < JOBS_MAX_START
+                ]
+                outcomes = await asyncio.gather(
+                    *[
+                        self._scrape_jobs_page(
+                            tab,
+                            f"{search_url}&start={start}",
+                            seen_ids,
+                            limit - len(results),
+                            # La primera página ya quedó cargada al abrir la búsqueda.
+                            navigate=not (first_wave and index == 0),
                         )
-                    except Exception:
-                        continue
+                        for index, (tab, start) in enumerate(zip(tabs, starts))
+                    ]
+                )
+                first_wave = False
+                offset = starts[-1] + JOBS_PAGE_SIZE
 
+                before = len(results)
+                exhausted = False
+                for start, (records, card_count, complete) in zip(starts, outcomes):
+                    kept = records[: limit - len(results)]
+                    results.extend(kept)
+                    # Cada pestaña pudo reunir hasta el límite completo. Lo recortado no cuenta como
+                    # visto y el checkpoint vuelve a la primera página incompleta: al reanudar con un
+                    # --limit mayor esas ofertas se recorren de nuevo en vez de perderse.
+                    seen_ids.difference_update(record.source_id for record in records[len(kept):])
+                    if (len(kept) < len(records) or not complete) and offset > start:
+                        offset = start
+                    if card_count == 0:
+                        exhausted = True
+
+                self.rate_limiter.observe_round(len(results) - before)
                 if len(results) == before:
-                    no_new_rounds += 1
+                    empty_waves += 1
                 else:
-                    no_new_rounds = 0
-
-                await page.evaluate(
-                    """
-                    () => {
-                        const list = document.querySelector('.jobs-search-results-list') ||
-                                     document.querySelector('.jobs-search-results-list__list');
-                        if (list) {
-                            list.scrollBy(0, 1200);
-                        } else {
-                            window.scrollBy(0, 1200);
-                        }
-                    }
-                    """
-                )
-                await asyncio.sleep(2)
-
+                    empty_waves = 0
+                    await self._emit_batch(checkpoint, on_batch, results[before:])
+                    if checkpoint:
+                        checkpoint.save(seen_ids, already_saved + len(results), offset)
+
+                # Una página sin tarjetas es el final de los resultados de la búsqueda.
+                if exhausted:
+                    break
+
+            self._mark_session_valid()
+            # Terminar antes del límite significa que la búsqueda no tiene más resultados.
+            await self._finish_checkpoint(
+                checkpoint, seen_ids, already_saved + len(results), offset, keep_checkpoint, len(results) < limit
+            )
             return results
         finally:
-            await browser.close()
-            await playwright.stop()
+            await self._close(playwright, browser, context)
+
+    async def scrape_posts(
+        self,
+        keywords: str,
+        limit: int,
+        antiquity_days: int | None = None,
+        on_batch: BatchCallback | None = None,
+        resume: bool = False,
+        keep_checkpoint: bool = False,
+    ) -> list[ScrapedRecord]:
+        checkpoint = self._start_checkpoint("feed", keywords, antiquity_days, resume)
+        seen_ids: set[str] = set(checkpoint.seen_ids) if checkpoint else set()
+        depth = checkpoint.depth if checkpoint else 0
+        already_saved = checkpoint.collected - len(checkpoint.pending) if checkpoint else 0
+        limit -= already_saved
+        results: list[ScrapedRecord] = list(checkpoint.pending) if checkpoint else []
+
+        if results:
+            # Lo reunido antes de la caída pudo no alcanzar a guardarse; el upsert es idempotente.
+            await self._emit_batch(checkpoint, on_batch, list(results))
+        if checkpoint and (checkpoint.complete or len(results) >= limit):
+            await self._finish_checkpoint(
+                checkpoint, seen_ids, already_saved + len(results), depth, keep_checkpoint, checkpoint.complete
+            )
+            return results
+
+        date_filter = ""
+        if antiquity_days:
+            if antiquity_days <= 1:
+                date_filter = '&datePublished=%22past-24h%22'
+            elif antiquity_days <= 7:
+                date_filter = '&datePublished=%22past-week%22'
 
-    async def scrape_posts(self, keywords: str, limit: int, antiquity_days: int | None = None) -> list[dict[str, Any]]:
-        playwright, browser, _, page = await self._get_authenticated_page()
-        results: list[dict[str, Any]] = []
-        seen_ids: set[str] = set()
+        search_url = (
+            f"{self.base_url}/search/results/content/?keywords={quote_plus(keywords)}"
+            f"{date_filter}&sortBy=%22date_posted%22"
+        )
+        logger.info("Buscando posts/feed: %s", search_url)
+        playwright, browser, context, page = await self._open_search("feed", search_url)
 
         try:
-            date_filter = ""
-            if antiquity_days:
-                if antiquity_days <= 1:
-                    date_filter = '&datePublished=%22past-24h%22'
-                elif antiquity_days <= 7:
-                    date_filter = '&datePublished=%22past-week%22'
-
-            search_url = (
-                f"{self.base_url}/search/results/content/?keywords={quote_plus(keywords)}"
-                f"{date_filter}&sortBy=%22date_posted%22"
-            )
-            logger.info("Buscando posts/feed: %s", search_url)
-            await page.goto(search_url, wait_until="load", timeout=60000)
-            await asyncio.sleep(4)
+            for _ in range(depth):
+                await self._scroll(page, FEED_SCROLL_SCRIPT, FEED_CARD_SELECTOR)
 
             no_new_rounds = 0
             while len(results) < limit and no_new_rounds <= 8:
-                cards = await page.locator(
-                    ".feed-shared-update-v2, .search-content-entity-lockup, .search-results-container [data-urn]"
-                ).all()
+                cards = await page.locator(FEED_CARD_SELECTOR).all()
 
                 if not cards:
                     no_new_rounds += 1
-                    await page.evaluate("window.scrollBy(0, 1000)")
-                    await asyncio.sleep(2)
+                    self.rate_limiter.observe_round(0)
+                    await self._scroll(page, "window.scrollBy(0, 1000)", FEED_CARD_SELECTOR)
+                    depth += 1
                     continue
 
                 before = len(results)
@@ -324,40 +741,83 @@ class LinkedInScraper:
                             link = f"{self.base_url}/feed/update/{cleaned}/"
 
                         results.append(
-                            {
-                                "source_type": "feed",
-                                "source_id": post_id,
-                                "title": "",
-                                "company": "",
-                                "author": author or "Autor desconocido",
-                                "summary": (content[:260] + "...") if len(content) > 260 else content,
-                                "content": content,
-                                "seniority": self._estimate_seniority("", content),
-                                "apply_type": "N/A",
-                                "url": link or page.url,
-                                "scraped_at": datetime.now(UTC).isoformat(),
-                            }
+                            ScrapedRecord(
+                                source_type="feed",
+                                source_id=post_id,
+                                url=link or page.url,
+                                scraped_at=datetime.now(UTC).isoformat(),
+                                title="",
+                                company="",
+                                author=author or "Autor desconocido",
+                                summary=(content[:260] + "...") if len(content) > 260 else content,
+                                content=content,
+                                apply_type="N/A",
+                            )
                         )
                     except Exception:
                         continue
 
+                self.rate_limiter.observe_round(len(results) - before)
                 if len(results) == before:
                     no_new_rounds += 1
                 else:
                     no_new_rounds = 0
+                    await self._emit_batch(checkpoint, on_batch, results[before:])
+                    if checkpoint:
+                        checkpoint.save(seen_ids, already_saved + len(results), depth)
 
-                await page.evaluate("window.scrollBy(0, 1100)")
-                await asyncio.sleep(2)
+                await self._scroll(page, FEED_SCROLL_SCRIPT, FEED_CARD_SELECTOR)
+                depth += 1
 
+            self._mark_session_valid()
+            await self._finish_checkpoint(
+                checkpoint, seen_ids, already_saved + len(results), depth, keep_checkpoint, len(results) < limit
+            )
             return results
         finally:
-            await browser.close()
-            await playwright.stop()
-
-    async def scrape_mixed(self, keywords: str, limit: int, antiquity_days: int | None = None) -> list[dict[str, Any]]:
+            await self._close(playwright, browser, context)
+
+    async def scrape_mixed(
+        self,
+        keywords: str,
+        limit: int,
+        antiquity_days: int | None = None,
+        on_batch: BatchCallback | None = None,
+        resume: bool = False,
+    ) -> list[ScrapedRecord]:
         jobs_limit = max(1, limit // 2)
         feed_limit = max(1, limit - jobs_limit)
 
-        jobs = await self.scrape_jobs(keywords=keywords, limit=jobs_limit, antiquity_days=antiquity_days)
-        feed = await self.scrape_posts(keywords=keywords, limit=feed_limit, antiquity_days=antiquity_days)
+        # Los checkpoints de cada parte se conservan hasta terminar ambas: si el feed falla,
+        # reanudar no repite la parte de jobs. Se borran solo si todas las subidas terminaron bien.
+        uploads: list[asyncio.Future] = []
+
+        async def tracked_batch(batch: list[ScrapedRecord]) -> asyncio.Future | None:
+            upload = await on_batch(batch)
+            if upload is not None:
+                uploads.append(upload)
+            return upload
+
+        batch_callback = tracked_batch if on_batch else None
+        jobs = await self.scrape_jobs(
+            keywords=keywords,
+            limit=jobs_limit,
+            antiquity_days=antiquity_days,
+            on_batch=batch_callback,
+            resume=resume,
+            keep_checkpoint=True,
+        )
+        feed = await self.scrape_posts(
+            keywords=keywords,
+            limit=feed_limit,
+            antiquity_days=antiquity_days,
+            on_batch=batch_callback,
+            resume=resume,
+            keep_checkpoint=True,
+        )
+        # Cada parte ya esperó sus subidas al cerrar su checkpoint.
+        failed = any(upload.cancelled() or upload.exception() is not None for upload in uploads)
+        if self.checkpoint_dir and not self.replaying and not failed:
+            for kind in ("jobs", "feed"):
+                ScrapeCheckpoint(self.checkpoint_dir, kind, keywords, antiquity_days).clear()
         return jobs + feed
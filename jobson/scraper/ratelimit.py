@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Códigos con los que LinkedIn frena: 429 estándar y 999 (bloqueo propio de LinkedIn).
+THROTTLE_STATUSES = {429, 999}
+
+# Costo en tokens por acción. A la tasa inicial (0.5 tokens/s) equivale a las pausas fijas
+# de antes: 4s tras abrir una búsqueda, 2s por scroll y 1.4s por clic en una tarjeta.
+ACTION_COSTS = {"navigate": 2.0, "scroll": 1.0, "click": 0.7}
+
+
+# Token bucket con control AIMD: sube la tasa de a poco mientras LinkedIn responde rápido y la
+# recorta multiplicativamente ante latencias altas, rondas de scroll vacías o códigos 429/999
+# (estos últimos además abren un enfriamiento creciente antes de la siguiente acción).
+class AdaptiveRateLimiter:
+    def __init__(
+        self,
+        rate: float = 0.5,
+        min_rate: float = 0.1,
+        max_rate: float = 2.0,
+        capacity: float = 2.0,
+        target_latency: float = 3.0,
+        enabled: bool = True,
+    ):
+        self.min_rate = max(0.01, min_rate)
+        self.max_rate = max(self.min_rate, max_rate)
+        self.initial_rate = min(self.max_rate, max(self.min_rate, rate))
+        self.rate = self.initial_rate
+        self.capacity = max(capacity, max(ACTION_COSTS.values()))
+        self.target_latency = target_latency
+        self.enabled = enabled
+
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self._cooldown_until = 0.0
+        self._consecutive_throttles = 0
+        self.reset_metrics()
+
+    def reset_metrics(self) -> None:
+        self._actions: Counter[str] = Counter()
+        self._throttles: Counter[str] = Counter()
+        self._events: deque[dict[str, Any]] = deque(maxlen=20)
+        self._waited = 0.0
+        self._latency_total = 0.0
+        self._latency_count = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _set_rate(self, rate: float) -> None:
+        self.rate = min(self.max_rate, max(self.min_rate, rate))
+
+    def _record_event(self, kind: str, detail: str) -> None:
+        self._throttles[kind] += 1
+        self._events.append(
+            {"at": time.time(), "kind": kind, "detail": detail, "rate": round(self.rate, 3)}
+        )
+
+    async def acquire(self, action: str) -> None:
+        self._actions[action] += 1
+        if not self.enabled:
+            return
+
+        # Sin awaits entre revisar y descontar tokens: las pestañas paralelas de un mismo scraper
+        # comparten el balde sin necesidad de lock.
+        cost = ACTION_COSTS.get(action, 1.0)
+        while True:
+            self._refill()
+            wait = max(0.0, self._cooldown_until - time.monotonic())
+            if not wait and self._tokens >= cost:
+                self._tokens -= cost
+                return
+            if not wait:
+                wait = (cost - self._tokens) / self.rate
+            self._waited += wait
+            await asyncio.sleep(wait)
+
+    def observe_latency(self, action: str, seconds: float) -> None:
+        self._latency_total += seconds
+        self._latency_count += 1
+        if seconds > self.target_latency:
+            self._set_rate(self.rate * 0.8)
+            self._record_event("slow_response", f"{action} {seconds:.1f}s")
+        else:
+            self._consecutive_throttles = 0
+            self._set_rate(self.rate + 0.02)
+
+    def observe_status(self, status: int, url: str = "") -> None:
+        if status not in THROTTLE_STATUSES:
+            return
+        self._consecutive_throttles += 1
+        self._set_rate(self.rate * 0.5)
+        cooldown = min(300.0, 15.0 * 2 ** (self._consecutive_throttles - 1))
+        if self.enabled:
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + cooldown)
+        self._record_event(f"http_{status}", url[:200])
+        logger.warning(
+            "LinkedIn respondió %s; tasa reducida a %.2f acciones/s y pausa de %.0fs",
+            status,
+            self.rate,
+            cooldown,
+        )
+
+    def observe_round(self, new_items: int) -> None:
+        # Una ronda de scroll sin resultados nuevos suele ser contenido que no alcanzó a cargar.
+        if new_items:
+            self._set_rate(self.rate + 0.05)
+        else:
+            self._set_rate(self.rate * 0.85)
+            self._record_event("empty_round", "")
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "rate": round(self.rate, 3),
+            "actions": dict(self._actions),
+            "waited_seconds": round(self._waited, 1),
+            "avg_latency_ms": round(self._latency_total / self._latency_count * 1000, 1) if self._latency_count else 0.0,
+            "throttle_events": dict(self._throttles),
+            "recent_events": list(self._events),
+        }
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class SessionUnavailableError(RuntimeError):
+    def __init__(self, message: str, checkpoint: bool = False):
+        super().__init__(message)
+        self.checkpoint = checkpoint
+
+
+@dataclass
+class SessionState:
+    name: str
+    path: Path
+    status: str = "healthy"
+    reason: str = ""
+    quarantined_at: float | None = None
+    runs: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "status": self.status,
+            "reason": self.reason,
+            "quarantined_at": self.quarantined_at,
+            "runs": self.runs,
+            "errors": self.errors,
+        }
+
+
+# Pool de cuentas: cada archivo sessions/pool/<nombre>.json es un storage_state de Playwright.
+# El estado (salud, cuarentena, corridas recientes) vive en sessions/pool/_state.json.
+class SessionPool:
+    def __init__(
+        self,
+        pool_dir: Path,
+        default_session: Path | None = None,
+        max_runs_per_hour: int = 6,
+        min_interval_seconds: float = 60.0,
+    ):
+        self.pool_dir = pool_dir
+        self.pool_dir.mkdir(parents=True, exist_ok=True)
+        self.state_path = self.pool_dir / "_state.json"
+        self.default_session = default_session
+        self.max_runs_per_hour = max(1, max_runs_per_hour)
+        self.min_interval_seconds = max(0.0, min_interval_seconds)
+        self.sessions = self._load()
+
+    def _load(self) -> dict[str, SessionState]:
+        try:
+            saved = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            saved = {}
+
+        # <nombre>.status.json es la marca de validación que escribe el scraper junto a cada sesión.
+        paths = {
+            path.stem: path
+            for path in sorted(self.pool_dir.glob("*.json"))
+            if not path.name.startswith("_") and not path.name.endswith(".status.json")
+        }
+        # Sin cuentas en el pool se usa la sesión única de siempre como cuenta "default".
+        if not paths and self.default_session and self.default_session.exists():
+            paths["default"] = self.default_session
+
+        sessions = {}
+        for name, path in paths.items():
+            data = saved.get(name, {})
+            sessions[name] = SessionState(
+                name=name,
+                path=path,
+                status=data.get("status", "healthy"),
+                reason=data.get("reason", ""),
+                quarantined_at=data.get("quarantined_at"),
+                runs=[float(item) for item in data.get("runs", [])],
+                errors=int(data.get("errors", 0)),
+            )
+        return sessions
+
+    def save(self) -> None:
+        payload = {name: state.to_json() for name, state in self.sessions.items()}
+        self.state_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+    def path_for(self, name: str) -> Path:
+        return self.pool_dir / f"{name}.json"
+
+    def healthy(self) -> list[SessionState]:
+        return [state for state in self.sessions.values() if state.status == "healthy"]
+
+    def wait_time(self, name: str) -> float:
+        state = self.sessions[name]
+        now = time.time()
+        state.runs = [stamp for stamp in state.runs if now - stamp < 3600]
+
+        wait = 0.0
+        if state.runs:
+            wait = max(wait, state.runs[-1] + self.min_interval_seconds - now)
+        if len(state.runs) >= self.max_runs_per_hour:
+            wait = max(wait, state.runs[-self.max_runs_per_hour] + 3600 - now)
+        return max(0.0, wait)
+
+    def record_run(self, name: str) -> None:
+        self.sessions[name].runs.append(time.time())
+        self.save()
+
+    def record_error(self, name: str) -> None:
+        self.sessions[name].errors += 1
+        self.save()
+
+    def quarantine(self, name: str, reason: str) -> None:
+        state = self.sessions[name]
+        state.status = "quarantined"
+        state.reason = reason
+        state.quarantined_at = time.time()
+        self.save()
+        logger.warning("Sesión %s en cuarentena: %s", name, reason)
+
+    def release(self, name: str) -> None:
+        if name not in self.sessions:
+            raise KeyError(f"No existe la sesión {name} en {self.pool_dir}")
+        state = self.sessions[name]
+        state.status = "healthy"
+        state.reason = ""
+        state.quarantined_at = None
+        state.errors = 0
+        self.save()
+
+    def describe(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "name": state.name,
+                "status": state.status,
+                "reason": state.reason,
+                "runs_last_hour": len([stamp for stamp in state.runs if time.time() - stamp < 3600]),
+                "errors": state.errors,
+            }
+            for state in self.sessions.values()
+        ]
@@ -1,23 +1,41 @@
 from __future__ import annotations
 
+import asyncio
 import csv
+import logging
 import re
+from collections.abc import Callable
 from datetime import UTC, datetime
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from jobson.scraper.linkedin import LinkedInScraper
+from jobson.enrichment import EnrichmentStage
+from jobson.models import ScrapedRecord
+from jobson.scraper.sessions import SessionPool, SessionState, SessionUnavailableError
 from jobson.storage.base import BaseRepository
+from jobson.storage.transport import track_requests
+
+if TYPE_CHECKING:
+    from jobson.scraper.linkedin import LinkedInScraper
+
+logger = logging.getLogger(__name__)
 
 
 class SearchService:
-    def __init__(self, scraper: LinkedInScraper, repository: BaseRepository, data_dir: Path):
+    def __init__(
+        self,
+        scraper: LinkedInScraper,
+        repository: BaseRepository,
+        data_dir: Path,
+        enrichment: EnrichmentStage | None = None,
+    ):
         self.scraper = scraper
         self.repository = repository
+        self.enrichment = enrichment or EnrichmentStage()
         self.data_dir = data_dir
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
-    def _save_csv(self, records: list[dict[str, Any]], mode: str, keywords: str) -> str | None:
+    def _save_csv(self, records: list[ScrapedRecord], mode: str, keywords: str) -> str | None:
         if not records:
             return None
 
@@ -35,50 +53,187 @@ class SearchService:
             "content",
             "seniority",
             "apply_type",
+            "work_mode",
+            "location",
+            "salary_min",
+            "salary_max",
+            "salary_currency",
+            "tech_tags",
             "url",
             "scraped_at",
         ]
 
         with path.open("w", encoding="utf-8", newline="") as handle:
-            writer = csv.DictWriter(handle, fieldnames=fieldnames)
+            writer = csv.DictWriter(handle, fieldnames=fieldnames, extrasaction="ignore")
             writer.writeheader()
-            writer.writerows(records)
+            writer.writerows(record.to_json() for record in records)
 
         return str(path)
 
+    def _merge_persistence(self, batches: list[dict[str, int]]) -> dict[str, int]:
+        merged = {"received": 0, "inserted": 0, "updated": 0, "unchanged": 0}
+        for batch in batches:
+            for key, value in batch.items():
+                merged[key] = merged.get(key, 0) + value
+        return merged
+
+    def _validate_mode(self, mode: str) -> str:
+        mode = mode.strip().lower()
+        if mode not in {"jobs", "feed", "mixed"}:
+            raise ValueError("Modo inválido. Usa jobs, feed o mixed.")
+        return mode
+
     async def run_search(
         self,
         mode: str,
         keywords: str,
         limit: int,
         days: int | None,
+        resume: bool = False,
     ) -> dict[str, Any]:
-        mode = mode.strip().lower()
-        if mode not in {"jobs", "feed", "mixed"}:
-            raise ValueError("Modo inválido. Usa jobs, feed o mixed.")
+        mode = self._validate_mode(mode)
+        try:
+            return await self._run_with_scraper(self.scraper, mode, keywords, limit, days, resume)
+        finally:
+            await self.repository.aclose()
+
+    async def _run_with_scraper(
+        self,
+        scraper: LinkedInScraper,
+        mode: str,
+        keywords: str,
+        limit: int,
+        days: int | None,
+        resume: bool = False,
+    ) -> dict[str, Any]:
+        # La tasa aprendida se conserva entre búsquedas; las métricas son por búsqueda.
+        scraper.rate_limiter.reset_metrics()
+        # Cada ronda de scroll entrega su lote y se sube en segundo plano mientras sigue el scraping.
+        uploads: list[asyncio.Task[dict[str, int]]] = []
+
+        async def persist_batch(batch: list[ScrapedRecord]) -> asyncio.Task[dict[str, int]]:
+            # Enriquecer in situ: los mismos registros terminan en el CSV de la corrida.
+            self.enrichment.run(batch)
+            upload = asyncio.create_task(
+                self.repository.aupsert_results(list(batch), keyword=keywords, search_mode=mode)
+            )
+            uploads.append(upload)
+            # El scraper saca el lote de su checkpoint cuando esta tarea termina bien.
+            return upload
+
+        # Latencias y reintentos HTTP solo de esta búsqueda: las subidas heredan el contexto.
+        with track_requests() as request_stats:
+            try:
+                if mode == "jobs":
+                    records = await scraper.scrape_jobs(keywords, limit, days, on_batch=persist_batch, resume=resume)
+                elif mode == "feed":
+                    records = await scraper.scrape_posts(keywords, limit, days, on_batch=persist_batch, resume=resume)
+                else:
+                    records = await scraper.scrape_mixed(keywords, limit, days, on_batch=persist_batch, resume=resume)
+            finally:
+                # Si el scraping falla, igual se esperan los lotes ya enviados para no perderlos.
+                outcomes = await asyncio.gather(*uploads, return_exceptions=True)
 
-        if mode == "jobs":
-            records = await self.scraper.scrape_jobs(keywords, limit, days)
-        elif mode == "feed":
-            records = await self.scraper.scrape_posts(keywords, limit, days)
-        else:
-            records = await self.scraper.scrape_mixed(keywords, limit, days)
+        failures = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        if failures:
+            raise failures[0]
+        persistence = self._merge_persistence(outcomes)
 
-        persistence = self.repository.upsert_results(records, keyword=keywords, search_mode=mode)
         csv_path = self._save_csv(records, mode=mode, keywords=keywords)
 
-        jobs_count = sum(1 for row in records if row.get("source_type") == "jobs")
-        feed_count = sum(1 for row in records if row.get("source_type") == "feed")
+        storage_metrics = self.repository.metrics()
+        if "http" in storage_metrics:
+            # El transporte es compartido: sus totales son de toda la vida del proceso.
+            storage_metrics["http"] = request_stats.snapshot()
+
+        jobs_count = sum(1 for row in records if row.source_type == "jobs")
+        feed_count = sum(1 for row in records if row.source_type == "feed")
 
         return {
             "mode": mode,
             "keywords": keywords,
             "limit": limit,
             "days": days,
+            "resumed": resume,
             "scraped_total": len(records),
             "scraped_jobs": jobs_count,
             "scraped_feed": feed_count,
             "persisted": persistence,
             "csv_path": csv_path,
             "storage_backend": self.repository.backend_name,
+            "storage_metrics": storage_metrics,
+            "rate_limit": scraper.rate_limiter.metrics(),
+        }
+
+    async def run_batch(
+        self,
+        queries: list[str],
+        mode: str,
+        limit: int,
+        days: int | None,
+        pool: SessionPool,
+        scraper_factory: Callable[[Path], LinkedInScraper],
+        max_accounts: int | None = None,
+        resume: bool = False,
+    ) -> dict[str, Any]:
+        mode = self._validate_mode(mode)
+        accounts = pool.healthy()[: max_accounts or None]
+        if not accounts:
+            raise RuntimeError("No hay sesiones sanas en el pool. Agrega una con --add-session NOMBRE.")
+
+        # Cola compartida: cada cuenta toma la siguiente búsqueda cuando su presupuesto lo permite,
+        # así las consultas se reparten solas entre las cuentas más rápidas.
+        queue: asyncio.Queue[tuple[str, bool]] = asyncio.Queue()
+        for query in queries:
+            queue.put_nowait((query, resume))
+
+        results: list[dict[str, Any]] = []
+        failed: list[dict[str, Any]] = []
+
+        async def run_account(state: SessionState) -> None:
+            scraper = scraper_factory(state.path)
+            while not queue.empty() and state.status == "healthy":
+                delay = pool.wait_time(state.name)
+                if delay:
+                    logger.info("Cuenta %s esperando %.0fs por su límite de uso", state.name, delay)
+                    await asyncio.sleep(delay)
+                try:
+                    keywords, resume_query = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                pool.record_run(state.name)
+                try:
+                    result = await self._run_with_scraper(scraper, mode, keywords, limit, days, resume_query)
+                except SessionUnavailableError as exc:
+                    pool.quarantine(state.name, str(exc))
+                    # La cuenta que la retome sigue desde el checkpoint en vez de empezar de cero.
+                    queue.put_nowait((keywords, True))
+                    return
+                except Exception as exc:
+                    logger.exception("Búsqueda '%s' falló con la cuenta %s", keywords, state.name)
+                    pool.record_error(state.name)
+                    failed.append({"keywords": keywords, "session": state.name, "error": str(exc)})
+                    continue
+
+                result["session"] = state.name
+                results.append(result)
+
+        try:
+            await asyncio.gather(*[run_account(state) for state in accounts])
+        finally:
+            await self.repository.aclose()
+
+        pending = []
+        while not queue.empty():
+            pending.append(queue.get_nowait()[0])
+
+        return {
+            "mode": mode,
+            "queries": len(queries),
+            "results": results,
+            "failed": failed,
+            "pending": pending,
+            "sessions": pool.describe(),
+            "storage_backend": self.repository.backend_name,
         }
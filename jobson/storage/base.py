@@ -1,12 +1,33 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from datetime import date, timedelta
 from typing import Any
 
+from jobson.models import ScrapedRecord
+
+FACET_FIELDS = ("source_type", "seniority", "apply_type", "company", "keyword", "day")
+# Filtros por igualdad exacta, respaldados por índices compuestos (columna, scraped_at desc).
+EXACT_FILTERS = ("seniority", "apply_type", "keyword", "company")
+
+
+# Días YYYY-MM-DD (ambos inclusivos) -> rango semiabierto [desde, antes) sobre scraped_at.
+def resolve_date_range(date_from: str | None, date_to: str | None) -> tuple[str | None, str | None]:
+    since = date.fromisoformat(date_from.strip()).isoformat() if date_from and date_from.strip() else None
+    before = (
+        (date.fromisoformat(date_to.strip()) + timedelta(days=1)).isoformat()
+        if date_to and date_to.strip()
+        else None
+    )
+    return since, before
+
 
 class BaseRepository(ABC):
     @abstractmethod
-    def upsert_results(self, records: list[dict[str, Any]], keyword: str, search_mode: str) -> dict[str, int]:
+    def upsert_results(self, records: list[ScrapedRecord], keyword: str, search_mode: str) -> dict[str, int]:
         raise NotImplementedError
 
     @abstractmethod
@@ -15,10 +36,93 @@ class BaseRepository(ABC):
         limit: int = 200,
         source_type: str | None = None,
         search_text: str | None = None,
+        *,
+        offset: int = 0,
+        seniority: str | None = None,
+        apply_type: str | None = None,
+        keyword: str | None = None,
+        company: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        collapse: bool = False,
     ) -> list[dict[str, Any]]:
         raise NotImplementedError
 
+    @abstractmethod
+    def facet_results(
+        self,
+        source_type: str | None = None,
+        search_text: str | None = None,
+        fields: tuple[str, ...] = FACET_FIELDS,
+        top: int = 10,
+        *,
+        seniority: str | None = None,
+        apply_type: str | None = None,
+        keyword: str | None = None,
+        company: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> dict[str, Any]:
+        raise NotImplementedError
+
+    # Recorre la tabla completa en lotes (para re-enriquecer) sin cargarla entera en memoria.
+    @abstractmethod
+    def iter_stored(self, batch_size: int = 1000) -> Iterator[list[dict[str, Any]]]:
+        raise NotImplementedError
+
+    # Mismos filtros y orden que list_results, pero recorre todo el resultado en lotes (para
+    # exportar) con memoria acotada al tamaño del lote.
+    @abstractmethod
+    def iter_results(
+        self,
+        batch_size: int = 1000,
+        source_type: str | None = None,
+        search_text: str | None = None,
+        *,
+        seniority: str | None = None,
+        apply_type: str | None = None,
+        keyword: str | None = None,
+        company: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        collapse: bool = False,
+    ) -> Iterator[list[dict[str, Any]]]:
+        raise NotImplementedError
+
+    # Reescribe solo las columnas derivadas (seniority, work_mode, ...) y el content_hash.
+    @abstractmethod
+    def update_enrichment(self, rows: list[dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    # Recalcula el SimHash de todas las filas y rearma los grupos de casi duplicados; devuelve
+    # cuántas filas se reagruparon.
+    @abstractmethod
+    def rebuild_clusters(self) -> int:
+        raise NotImplementedError
+
     @property
     @abstractmethod
     def backend_name(self) -> str:
         raise NotImplementedError
+
+    def metrics(self) -> dict[str, Any]:
+        return {}
+
+    def close(self) -> None:
+        return None
+
+    # Se llama en cada worker tras el fork del servidor WSGI (preload): recursos de red o hilos
+    # heredados del proceso maestro no se comparten entre procesos.
+    def after_fork(self) -> None:
+        return None
+
+    # API async: por defecto delega la versión síncrona a un hilo para no bloquear el event loop
+    # que también maneja Playwright. Los backends con cliente async propio la sobrescriben.
+    async def aupsert_results(self, records: list[ScrapedRecord], keyword: str, search_mode: str) -> dict[str, int]:
+        return await asyncio.to_thread(self.upsert_results, records, keyword, search_mode)
+
+    async def alist_results(self, limit: int = 200, **filters: Any) -> list[dict[str, Any]]:
+        return await asyncio.to_thread(functools.partial(self.list_results, limit, **filters))
+
+    async def aclose(self) -> None:
+        return None
@@ -2,15 +2,38 @@ from __future__ import annotations
 
 from jobson.config import Settings
 from jobson.storage.base import BaseRepository
+from jobson.storage.mirror_repository import MirroredRepository
+from jobson.storage.spooled_repository import SpooledRepository
 from jobson.storage.sqlite_repository import SQLiteRepository
 from jobson.storage.supabase_repository import SupabaseRepository
+from jobson.storage.transport import TransportConfig
 
 
 def build_repository(settings: Settings) -> BaseRepository:
     if settings.supabase_url and settings.supabase_key:
-        return SupabaseRepository(
+        remote = SupabaseRepository(
             url=settings.supabase_url,
             key=settings.supabase_key,
             table=settings.supabase_table,
+            transport_config=TransportConfig(
+                pool_size=max(1, settings.supabase_pool_size),
+                max_retries=max(0, settings.supabase_max_retries),
+                backoff_base=settings.supabase_backoff_seconds,
+                gzip_min_bytes=settings.supabase_gzip_min_bytes,
+            ),
         )
+        if settings.app_role == "full" and settings.spool_enabled:
+            return SpooledRepository(
+                settings.spool_path,
+                remote=remote,
+                batch_size=settings.spool_batch_size,
+                interval_seconds=settings.spool_interval_seconds,
+            )
+        if settings.app_role == "viewer" and settings.mirror_enabled:
+            return MirroredRepository(
+                settings.mirror_path,
+                remote=remote,
+                interval_seconds=settings.mirror_interval_seconds,
+            )
+        return remote
     return SQLiteRepository(settings.sqlite_path)
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from jobson.models import NormalizedRow
+from jobson.storage.base import FACET_FIELDS
+from jobson.storage.sqlite_repository import SQLiteRepository
+from jobson.storage.supabase_repository import SupabaseRepository
+
+logger = logging.getLogger(__name__)
+
+
+# Réplica local de solo lectura para servidores visor: un hilo trae de Supabase las filas con
+# updated_at posterior a la última sincronizada (nuevas o reescritas) y list_results se sirve
+# desde SQLite.
+class MirroredRepository(SQLiteRepository):
+    def __init__(
+        self,
+        db_path: Path,
+        remote: SupabaseRepository,
+        interval_seconds: float = 30.0,
+        page_size: int = 1000,
+    ):
+        self.remote = remote
+        self.interval_seconds = max(1.0, interval_seconds)
+        self.page_size = max(1, min(page_size, 1000))
+        super().__init__(db_path)
+
+        self._stop = threading.Event()
+        self._worker: threading.Thread | None = None
+        self._background = True
+        self._last_error: str | None = None
+        self._ensure_worker()
+
+    @property
+    def backend_name(self) -> str:
+        return "supabase+mirror"
+
+    def _init_db(self) -> None:
+        super()._init_db()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS mirror_state (
+                    name TEXT PRIMARY KEY,
+                    value TEXT
+                )
+                """
+            )
+
+    # Mirrors creados con la marca por created_at no tienen "updated_at": se sincronizan de nuevo
+    # desde el principio (el upsert es idempotente) para recoger las filas reescritas desde entonces.
+    def _get_watermark(self) -> tuple[str | None, str | None]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT name, value FROM mirror_state").fetchall()
+        state = {row["name"]: row["value"] for row in rows}
+        return state.get("updated_at"), state.get("updated_id")
+
+    def _set_watermark(self, conn, updated_at: str, row_id: str) -> None:
+        conn.executemany(
+            """
+            INSERT INTO mirror_state (name, value) VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET value=excluded.value
+            """,
+            [("updated_at", updated_at), ("updated_id", row_id)],
+        )
+
+    @property
+    def ready(self) -> bool:
+        return self._get_watermark()[0] is not None
+
+    def sync_once(self) -> int:
+        updated_at, row_id = self._get_watermark()
+        total = 0
+        while True:
+            rows = self.remote.fetch_updated_after(updated_at, row_id, limit=self.page_size)
+            if not rows:
+                return total
+
+            last = rows[-1]
+            updated_at, row_id = last["updated_at"], last["id"]
+            # Filas y marca de agua en la misma transacción: una caída no deja huecos.
+            with self._connect() as conn:
+                self._write_rows(conn, [NormalizedRow.from_mapping(row) for row in rows])
+                # El grupo cambia sin cambiar el contenido (al rearmar grupos): se copia siempre.
+                conn.executemany(
+                    "UPDATE linkedin_results SET cluster_id = ? WHERE dedupe_key = ?",
+                    [(row.get("cluster_id"), row["dedupe_key"]) for row in rows],
+                )
+                self._set_watermark(conn, updated_at, row_id)
+            total += len(rows)
+
+            if len(rows) < self.page_size:
+                return total
+
+    def _ensure_worker(self) -> None:
+        if not self._background or (self._worker is not None and self._worker.is_alive()):
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name="jobson-mirror-sync", daemon=True)
+        self._worker.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                pulled = self.sync_once()
+                self._last_error = None
+                if pulled:
+                    logger.info("Mirror local: %s filas nuevas desde Supabase", pulled)
+            except Exception as exc:
+                self._last_error = str(exc)
+                logger.warning("Sincronización del mirror falló: %s", exc)
+            self._stop.wait(self.interval_seconds)
+
+    def upsert_normalized(self, rows: list[NormalizedRow]) -> dict[str, int]:
+        # El mirror es de solo lectura: las escrituras van a Supabase y vuelven por la sincronización.
+        return self.remote.upsert_normalized([row._asdict() for row in rows])
+
+    def list_results(
+        self,
+        limit: int = 200,
+        source_type: str | None = None,
+        search_text: str | None = None,
+        **filters: Any,
+    ) -> list[dict[str, Any]]:
+        filters.update(source_type=source_type, search_text=search_text)
+        self._ensure_worker()
+        # Hasta completar la primera sincronización el mirror está vacío: se lee en vivo.
+        if not self.ready:
+            return self.remote.list_results(limit=limit, **filters)
+        return super().list_results(limit=limit, **filters)
+
+    def facet_results(
+        self,
+        source_type: str | None = None,
+        search_text: str | None = None,
+        fields: tuple[str, ...] = FACET_FIELDS,
+        top: int = 10,
+        **filters: Any,
+    ) -> dict[str, Any]:
+        filters.update(source_type=source_type, search_text=search_text)
+        self._ensure_worker()
+        if not self.ready:
+            return self.remote.facet_results(fields=fields, top=top, **filters)
+        return super().facet_results(fields=fields, top=top, **filters)
+
+    def iter_results(
+        self,
+        batch_size: int = 1000,
+        source_type: str | None = None,
+        search_text: str | None = None,
+        **filters: Any,
+    ) -> Iterator[list[dict[str, Any]]]:
+        filters.update(source_type=source_type, search_text=search_text)
+        self._ensure_worker()
+        if not self.ready:
+            return self.remote.iter_results(batch_size=batch_size, **filters)
+        return super().iter_results(batch_size=batch_size, **filters)
+
+    # Supabase es la tabla completa; el SQLite local se corrige en las filas que ya tenga.
+    def iter_stored(self, batch_size: int = 1000) -> Iterator[list[dict[str, Any]]]:
+        return self.remote.iter_stored(batch_size=batch_size)
+
+    def update_enrichment(self, rows: list[dict[str, Any]]) -> None:
+        super().update_enrichment(rows)
+        self.remote.update_enrichment(rows)
+
+    # Los grupos de casi duplicados vienen de Supabase con cada fila (ver sync_once): el mirror no
+    # los calcula por su cuenta, así todos los visores muestran los mismos grupos.
+    def _assign_clusters(self, conn: sqlite3.Connection, keys: list[str]) -> None:
+        return None
+
+    def _rebuild_clusters(self, conn: sqlite3.Connection) -> int:
+        return 0
+
+    def rebuild_clusters(self) -> int:
+        return self.remote.rebuild_clusters()
+
+    def metrics(self) -> dict[str, Any]:
+        created_at, _ = self._get_watermark()
+        return {
+            **self.remote.metrics(),
+            "mirror": {"synced_until": created_at, "last_error": self._last_error},
+        }
+
+    def after_fork(self) -> None:
+        # Con preload, el proceso maestro ya sincroniza en segundo plano; los workers solo usan el SQLite.
+        self._background = False
+        self.remote.after_fork()
+
+    def close(self) -> None:
+        self._stop.set()
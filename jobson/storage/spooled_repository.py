@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from jobson.models import NormalizedRow, now_iso
+from jobson.storage.base import FACET_FIELDS
+from jobson.storage.sqlite_repository import SQLiteRepository
+from jobson.storage.supabase_repository import SupabaseRepository
+
+logger = logging.getLogger(__name__)
+
+
+# Escribe primero en un spool SQLite local (commit inmediato y a prueba de caídas) y replica a
+# Supabase en lotes grandes desde un hilo. Cada fila queda en replication_outbox hasta que el
+# upsert remoto confirma: entrega al menos una vez, idempotente por dedupe_key. Las filas sin
+# cambios viajan solo como toque de last_seen_at y los hits de palabra clave se envían por marca
+# de agua sobre linkedin_keyword_hits.
+class SpooledRepository(SQLiteRepository):
+    def __init__(
+        self,
+        db_path: Path,
+        remote: SupabaseRepository,
+        batch_size: int = 500,
+        interval_seconds: float = 10.0,
+    ):
+        self.remote = remote
+        self.batch_size = max(1, batch_size)
+        self.interval_seconds = max(0.5, interval_seconds)
+        super().__init__(db_path)
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._idle = threading.Event()
+        self._worker: threading.Thread | None = None
+        self._background = True
+        self._last_error: str | None = None
+        self._ensure_worker()
+
+    @property
+    def backend_name(self) -> str:
+        return "supabase+spool"
+
+    def _init_db(self) -> None:
+        super()._init_db()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS replication_outbox (
+                    dedupe_key TEXT PRIMARY KEY,
+                    enqueued_at TEXT NOT NULL,
+                    touch_only INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(replication_outbox)")}
+            if "touch_only" not in columns:
+                conn.execute("ALTER TABLE replication_outbox ADD COLUMN touch_only INTEGER NOT NULL DEFAULT 0")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS replication_state (
+                    name TEXT PRIMARY KEY,
+                    value TEXT
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_replication_outbox_enqueued_at ON replication_outbox(enqueued_at)"
+            )
+
+    def _write_rows(self, conn: sqlite3.Connection, rows: list[NormalizedRow]) -> dict[str, int]:
+        fresh, changed, unchanged = self._partition_rows(conn, rows)
+        counts = self._apply_rows(conn, fresh, changed, unchanged)
+        enqueued_at = now_iso()
+        # Un toque nunca rebaja una fila completa que sigue pendiente de subir.
+        conn.executemany(
+            """
+            INSERT INTO replication_outbox (dedupe_key, enqueued_at, touch_only) VALUES (?, ?, ?)
+            ON CONFLICT(dedupe_key) DO UPDATE SET
+                enqueued_at=excluded.enqueued_at,
+                touch_only=min(replication_outbox.touch_only, excluded.touch_only)
+            """,
+            [(item.dedupe_key, enqueued_at, 0) for item in (*fresh, *changed)]
+            + [(item.dedupe_key, enqueued_at, 1) for item in unchanged],
+        )
+        return counts
+
+    def _get_hits_watermark(self, conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT value FROM replication_state WHERE name = 'hits_id'").fetchone()
+        return int(row["value"]) if row else 0
+
+    def upsert_normalized(self, rows: list[NormalizedRow]) -> dict[str, int]:
+        counts = super().upsert_normalized(rows)
+        self._ensure_worker()
+        if self.pending_count() >= self.batch_size:
+            self._wake.set()
+        return counts
+
+    def list_results(
+        self,
+        limit: int = 200,
+        source_type: str | None = None,
+        search_text: str | None = None,
+        **filters: Any,
+    ) -> list[dict[str, Any]]:
+        filters.update(source_type=source_type, search_text=search_text)
+        # Supabase sigue siendo la fuente de verdad compartida con los visores; si no responde,
+        # se sirve lo que tenga el spool local.
+        try:
+            return self.remote.list_results(limit=limit, **filters)
+        except Exception as exc:
+            logger.warning("Supabase no disponible para lectura, usando spool local: %s", exc)
+            return super().list_results(limit=limit, **filters)
+
+    def facet_results(
+        self,
+        source_type: str | None = None,
+        search_text: str | None = None,
+        fields: tuple[str, ...] = FACET_FIELDS,
+        top: int = 10,
+        **filters: Any,
+    ) -> dict[str, Any]:
+        filters.update(source_type=source_type, search_text=search_text)
+        try:
+            return self.remote.facet_results(fields=fields, top=top, **filters)
+        except Exception as exc:
+            logger.warning("Supabase no disponible para facetas, usando spool local: %s", exc)
+            return super().facet_results(fields=fields, top=top, **filters)
+
+    def pending_count(self) -> int:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT COUNT(*) FROM replication_outbox").fetchone()[0]
+            hits = conn.execute(
+                "SELECT COUNT(*) FROM linkedin_keyword_hits WHERE id > ?",
+                (self._get_hits_watermark(conn),),
+            ).fetchone()[0]
+        return rows + hits
+
+    def iter_results(
+        self,
+        batch_size: int = 1000,
+        source_type: str | None = None,
+        search_text: str | None = None,
+        **filters: Any,
+    ) -> Iterator[list[dict[str, Any]]]:
+        # Sin fallback al spool: cambiar de fuente a mitad de una exportación mezclaría datos.
+        filters.update(source_type=source_type, search_text=search_text)
+        return self.remote.iter_results(batch_size=batch_size, **filters)
+
+    # Supabase es la tabla completa; el SQLite local se corrige en las filas que ya tenga.
+    def iter_stored(self, batch_size: int = 1000) -> Iterator[list[dict[str, Any]]]:
+        return self.remote.iter_stored(batch_size=batch_size)
+
+    def update_enrichment(self, rows: list[dict[str, Any]]) -> None:
+        super().update_enrichment(rows)
+        self.remote.update_enrichment(rows)
+
+    def rebuild_clusters(self) -> int:
+        super().rebuild_clusters()
+        return self.remote.rebuild_clusters()
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            **self.remote.metrics(),
+            "spool": {"pending": self.pending_count(), "last_error": self._last_error},
+        }
+
+    def replicate_once(self) -> int:
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT r.*, o.enqueued_at AS outbox_enqueued_at, o.touch_only AS outbox_touch_only
+                FROM replication_outbox o
+                JOIN linkedin_results r ON r.dedupe_key = o.dedupe_key
+                ORDER BY o.enqueued_at
+                LIMIT ?
+                """,
+                (self.batch_size,),
+            ).fetchall()
+            hits = conn.execute(
+                """
+                SELECT id, dedupe_key, keyword, search_mode, seen_at
+                FROM linkedin_keyword_hits
+                WHERE id > ?
+                ORDER BY id
+                LIMIT ?
+                """,
+                (self._get_hits_watermark(conn), self.batch_size),
+            ).fetchall()
+
+        if not rows and not hits:
+            return 0
+
+        payload = []
+        acked = []
+        for row in rows:
+            item = dict(row)
+            acked.append((item["dedupe_key"], item.pop("outbox_enqueued_at")))
+            item.pop("id", None)
+            if item.pop("outbox_touch_only"):
+                # El remoto ya tiene este contenido: basta con la clave, el hash y la fecha.
+                item = {key: item[key] for key in ("dedupe_key", "content_hash", "last_seen_at")}
+            payload.append(item)
+        hit_payload = [{key: hit[key] for key in ("dedupe_key", "keyword", "search_mode", "seen_at")} for hit in hits]
+
+        self.remote.upsert_normalized(payload, hits=hit_payload)
+
+        # Solo se borra si no se re-encoló una versión más nueva mientras se subía el lote.
+        with self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM replication_outbox WHERE dedupe_key = ? AND enqueued_at = ?",
+                acked,
+            )
+            if hits:
+                conn.execute(
+                    """
+                    INSERT INTO replication_state (name, value) VALUES ('hits_id', ?)
+                    ON CONFLICT(name) DO UPDATE SET value=excluded.value
+                    """,
+                    (str(hits[-1]["id"]),),
+                )
+        return len(payload) + len(hit_payload)
+
+    def _ensure_worker(self) -> None:
+        if not self._background or (self._worker is not None and self._worker.is_alive()):
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name="jobson-spool-replicator", daemon=True)
+        self._worker.start()
+
+    def _run(self) -> None:
+        failures = 0
+        while not self._stop.is_set():
+            try:
+                while self.replicate_once():
+                    if self._stop.is_set():
+                        break
+                failures = 0
+                self._last_error = None
+                self._idle.set()
+                delay = self.interval_seconds
+            except Exception as exc:
+                failures += 1
+                self._last_error = str(exc)
+                self._idle.clear()
+                delay = min(300.0, self.interval_seconds * (2 ** min(failures, 5)))
+                logger.warning("Replicación a Supabase falló (%s); reintento en %.0fs", exc, delay)
+
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def flush(self, timeout: float = 60.0) -> bool:
+        deadline = time.monotonic() + timeout
+        self._ensure_worker()
+        while time.monotonic() < deadline:
+            if self.pending_count() == 0:
+                return True
+            self._idle.clear()
+            self._wake.set()
+            self._idle.wait(min(1.0, max(0.0, deadline - time.monotonic())))
+        return self.pending_count() == 0
+
+    def after_fork(self) -> None:
+        # Con preload, el proceso maestro ya replica en segundo plano; los workers solo usan el SQLite.
+        self._background = False
+        self.remote.after_fork()
+
+    def close(self) -> None:
+        if not self.flush():
+            logger.warning(
+                "Quedan %s registros sin replicar en %s; se enviarán en la próxima ejecución.",
+                self.pending_count(),
+                self.db_path,
+            )
+        self._stop.set()
+        self._wake.set()
@@ -1,11 +1,53 @@
 from __future__ import annotations
 
 import sqlite3
+from collections.abc import Iterator
+from operator import attrgetter
 from pathlib import Path
 from typing import Any
 
-from jobson.models import normalize_record
-from jobson.storage.base import BaseRepository
+from jobson.enrichment import ENRICHED_FIELDS
+from jobson.models import CONTENT_FIELDS, NormalizedRow, ScrapedRecord, normalize_record
+from jobson.similarity import (
+    BAND_EXPRESSIONS,
+    MAX_DISTANCE,
+    PROBE_COUNT,
+    SIMHASH_LAYOUT,
+    band_probes,
+    hamming_distance,
+    record_simhash,
+)
+from jobson.storage.base import EXACT_FILTERS, FACET_FIELDS, BaseRepository, resolve_date_range
+
+# Expresiones de agrupación por faceta; "day" usa el índice por expresión de _init_db.
+FACET_EXPRESSIONS = {
+    "source_type": "source_type",
+    "seniority": "seniority",
+    "apply_type": "apply_type",
+    "company": "company",
+    "keyword": "keyword",
+    "day": "substr(scraped_at, 1, 10)",
+}
+FACET_LIMITS = {"source_type": 10, "day": 60}
+
+# Las NormalizedRow ya vienen en este orden: se insertan sin armar tuplas intermedias.
+ROW_COLUMNS = NormalizedRow._fields
+# cluster_id no se toca al reescribir: una edición menor no saca al registro de su grupo.
+CHANGED_COLUMNS = (*CONTENT_FIELDS, "scraped_at", "last_seen_at", "content_hash", "simhash")
+CHANGED_VALUES = attrgetter(*CHANGED_COLUMNS)
+# Columnas agregadas después de la tabla original, con su tipo para migrar bases existentes.
+ADDED_COLUMNS = {
+    "content_hash": "TEXT",
+    "last_seen_at": "TEXT",
+    "work_mode": "TEXT",
+    "location": "TEXT",
+    "salary_min": "REAL",
+    "salary_max": "REAL",
+    "salary_currency": "TEXT",
+    "tech_tags": "TEXT",
+    "simhash": "INTEGER",
+    "cluster_id": "TEXT",
+}
 
 
 class SQLiteRepository(BaseRepository):
@@ -25,6 +67,9 @@ class SQLiteRepository(BaseRepository):
 
     def _init_db(self) -> None:
         with self._connect() as conn:
+            # WAL: una exportación larga (un cursor abierto toda la descarga) no bloquea al scraper
+            # que escribe al mismo tiempo, y el lector ve una foto consistente.
+            conn.execute("PRAGMA journal_mode=WAL")
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS linkedin_results (
@@ -42,83 +87,261 @@ class SQLiteRepository(BaseRepository):
                     keyword TEXT NOT NULL,
                     search_mode TEXT NOT NULL,
                     scraped_at TEXT NOT NULL,
-                    dedupe_key TEXT NOT NULL UNIQUE
+                    dedupe_key TEXT NOT NULL UNIQUE,
+                    content_hash TEXT,
+                    last_seen_at TEXT,
+                    work_mode TEXT,
+                    location TEXT,
+                    salary_min REAL,
+                    salary_max REAL,
+                    salary_currency TEXT,
+                    tech_tags TEXT,
+                    simhash INTEGER,
+                    cluster_id TEXT
+                )
+                """
+            )
+            # Bases creadas antes de estas columnas: las filas viejas quedan con hash nulo y se
+            # reescriben una sola vez la próxima vez que se vean (o con --reenrich).
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(linkedin_results)")}
+            for column, column_type in ADDED_COLUMNS.items():
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE linkedin_results ADD COLUMN {column} {column_type}")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS linkedin_keyword_hits (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    dedupe_key TEXT NOT NULL,
+                    keyword TEXT NOT NULL,
+                    search_mode TEXT NOT NULL,
+                    seen_at TEXT NOT NULL,
+                    UNIQUE (dedupe_key, keyword, search_mode, seen_at)
                 )
                 """
             )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_linkedin_keyword_hits_keyword ON linkedin_keyword_hits(keyword, seen_at DESC)"
+            )
             conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_linkedin_results_scraped_at ON linkedin_results(scraped_at DESC)"
             )
+            # Índices compuestos (filtro, scraped_at desc): filtran y devuelven ya ordenado.
+            # También cubren el GROUP BY de facet_results, por eso reemplazan a los de una columna.
+            for column in ("source_type", *EXACT_FILTERS):
+                conn.execute(f"DROP INDEX IF EXISTS idx_linkedin_results_{column}")
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_linkedin_results_{column}_scraped_at "
+                    f"ON linkedin_results({column}, scraped_at DESC)"
+                )
             conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_linkedin_results_source_type ON linkedin_results(source_type)"
+                "CREATE INDEX IF NOT EXISTS idx_linkedin_results_day ON linkedin_results(substr(scraped_at, 1, 10))"
             )
+            # Índice de casi duplicados: una entrada por banda del SimHash (ver jobson/similarity.py),
+            # solo para los líderes de grupo, que son contra los que se compara. El nombre lleva el
+            # formato del SimHash: si quedan índices de otro formato, los hashes guardados son viejos.
+            band_indexes = {
+                f"idx_linkedin_results_simhash_{SIMHASH_LAYOUT}_b{band}": expression
+                for band, expression in enumerate(BAND_EXPRESSIONS)
+            }
+            stale = [
+                row["name"]
+                for row in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_linkedin_results_simhash%'"
+                )
+                if row["name"] not in band_indexes
+            ]
+            for name in stale:
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
+            for name, expression in band_indexes.items():
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {name} ON linkedin_results(source_type, {expression}) "
+                    "WHERE simhash IS NOT NULL AND cluster_id = dedupe_key"
+                )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_linkedin_results_cluster ON linkedin_results(cluster_id)"
+            )
+            if stale:
+                self._rebuild_clusters(conn)
 
-    def upsert_results(self, records: list[dict[str, Any]], keyword: str, search_mode: str) -> dict[str, int]:
+    def upsert_results(self, records: list[ScrapedRecord], keyword: str, search_mode: str) -> dict[str, int]:
         normalized = [normalize_record(record, keyword, search_mode) for record in records]
-        unique_records = {item["dedupe_key"]: item for item in normalized}
+        unique_records = {item.dedupe_key: item for item in normalized}
 
         if not unique_records:
-            return {"received": 0, "inserted": 0, "updated": 0}
+            return {"received": 0, "inserted": 0, "updated": 0, "unchanged": 0}
 
-        keys = list(unique_records.keys())
-        existing_keys: set[str] = set()
+        counts = self.upsert_normalized(list(unique_records.values()))
+        return {"received": len(records), **counts}
 
+    def upsert_normalized(self, rows: list[NormalizedRow]) -> dict[str, int]:
         with self._connect() as conn:
-            placeholders = ",".join(["?"] * len(keys))
-            query = f"SELECT dedupe_key FROM linkedin_results WHERE dedupe_key IN ({placeholders})"
-            for row in conn.execute(query, keys).fetchall():
-                existing_keys.add(row["dedupe_key"])
+            return self._write_rows(conn, rows)
 
-            for item in unique_records.values():
-                conn.execute(
-                    """
-                    INSERT INTO linkedin_results (
-                        source_type, source_id, title, company, author, summary, content,
-                        seniority, apply_type, url, keyword, search_mode, scraped_at, dedupe_key
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ON CONFLICT(dedupe_key) DO UPDATE SET
-                        source_type=excluded.source_type,
-                        source_id=excluded.source_id,
-                        title=excluded.title,
-                        company=excluded.company,
-                        author=excluded.author,
-                        summary=excluded.summary,
-                        content=excluded.content,
-                        seniority=excluded.seniority,
-                        apply_type=excluded.apply_type,
-                        url=excluded.url,
-                        keyword=excluded.keyword,
-                        search_mode=excluded.search_mode,
-                        scraped_at=excluded.scraped_at
-                    """,
-                    (
-                        item["source_type"],
-                        item["source_id"],
-                        item["title"],
-                        item["company"],
-                        item["author"],
-                        item["summary"],
-                        item["content"],
-                        item["seniority"],
-                        item["apply_type"],
-                        item["url"],
-                        item["keyword"],
-                        item["search_mode"],
-                        item["scraped_at"],
-                        item["dedupe_key"],
-                    ),
+    def _partition_rows(
+        self, conn: sqlite3.Connection, rows: list[NormalizedRow]
+    ) -> tuple[list[NormalizedRow], list[NormalizedRow], list[NormalizedRow]]:
+        keys = [item.dedupe_key for item in rows]
+        placeholders = ",".join(["?"] * len(keys))
+        query = f"SELECT dedupe_key, content_hash FROM linkedin_results WHERE dedupe_key IN ({placeholders})"
+        existing = {row["dedupe_key"]: row["content_hash"] for row in conn.execute(query, keys).fetchall()}
+
+        fresh, changed, unchanged = [], [], []
+        for item in rows:
+            if item.dedupe_key not in existing:
+                fresh.append(item)
+            elif existing[item.dedupe_key] != item.content_hash:
+                changed.append(item)
+            else:
+                unchanged.append(item)
+        return fresh, changed, unchanged
+
+    def _apply_rows(
+        self,
+        conn: sqlite3.Connection,
+        fresh: list[NormalizedRow],
+        changed: list[NormalizedRow],
+        unchanged: list[NormalizedRow],
+    ) -> dict[str, int]:
+        if fresh:
+            conn.executemany(
+                f"""
+                INSERT INTO linkedin_results ({", ".join(ROW_COLUMNS)})
+                VALUES ({", ".join(["?"] * len(ROW_COLUMNS))})
+                ON CONFLICT(dedupe_key) DO NOTHING
+                """,
+                fresh,
+            )
+
+        # Contenido distinto: se reescribe el registro, pero keyword/search_mode conservan la
+        # búsqueda que lo encontró primero (todas quedan en linkedin_keyword_hits).
+        if changed:
+            conn.executemany(
+                f"""
+                UPDATE linkedin_results SET
+                    {", ".join(f"{column}=?" for column in CHANGED_COLUMNS)}
+                WHERE dedupe_key = ?
+                """,
+                [(*CHANGED_VALUES(item), item.dedupe_key) for item in changed],
+            )
+
+        # Sin cambios: solo se adelanta last_seen_at, y ni eso si ya estaba al día.
+        if unchanged:
+            conn.executemany(
+                """
+                UPDATE linkedin_results SET last_seen_at = ?
+                WHERE dedupe_key = ? AND (last_seen_at IS NULL OR last_seen_at < ?)
+                """,
+                [(item.last_seen_at, item.dedupe_key, item.last_seen_at) for item in unchanged],
+            )
+
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO linkedin_keyword_hits (dedupe_key, keyword, search_mode, seen_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            [
+                (item.dedupe_key, item.keyword, item.search_mode, item.last_seen_at)
+                for item in (*fresh, *changed, *unchanged)
+            ],
+        )
+        self._assign_clusters(conn, [item.dedupe_key for item in (*fresh, *changed)])
+        return {"inserted": len(fresh), "updated": len(changed), "unchanged": len(unchanged)}
+
+    # Filas sin grupo: se busca un líder de grupo (la fila que lo abrió) con alguna banda igual o a
+    # un bit y distancia <= MAX_DISTANCE; si no hay, la fila abre su propio grupo. Comparar solo
+    # contra líderes acota los candidatos aunque un aviso se haya repetido cientos de veces. Va de a
+    # una y en orden de llegada para que los duplicados dentro del mismo lote también se encuentren.
+    def _assign_clusters(self, conn: sqlite3.Connection, keys: list[str]) -> None:
+        if not keys:
+            return
+        placeholders = ",".join(["?"] * len(keys))
+        pending = conn.execute(
+            f"""
+            SELECT dedupe_key, source_type, simhash FROM linkedin_results
+            WHERE dedupe_key IN ({placeholders}) AND cluster_id IS NULL
+            ORDER BY scraped_at, id
+            """,
+            keys,
+        ).fetchall()
+        self._cluster_rows(conn, pending)
+
+    def _cluster_rows(self, conn: sqlite3.Connection, pending: list[sqlite3.Row]) -> None:
+        # UNION ALL y no OR: así cada banda se resuelve con su índice (source_type, banda); el IN
+        # son búsquedas puntuales sobre ese mismo índice.
+        probes = ",".join(["?"] * PROBE_COUNT)
+        band_sql = " UNION ALL ".join(
+            "SELECT cluster_id, simhash FROM linkedin_results "
+            f"WHERE source_type = ? AND simhash IS NOT NULL AND {expression} IN ({probes}) "
+            "AND cluster_id = dedupe_key"
+            for expression in BAND_EXPRESSIONS
+        )
+        for row in pending:
+            cluster_id = row["dedupe_key"]
+            if row["simhash"] is not None:
+                params = [
+                    value for band in band_probes(row["simhash"]) for value in (row["source_type"], *band)
+                ]
+                candidates = conn.execute(band_sql, params).fetchall()
+                best = min(
+                    candidates,
+                    key=lambda candidate: hamming_distance(candidate["simhash"], row["simhash"]),
+                    default=None,
                 )
+                if best is not None and hamming_distance(best["simhash"], row["simhash"]) <= MAX_DISTANCE:
+                    cluster_id = best["cluster_id"]
+            conn.execute(
+                "UPDATE linkedin_results SET cluster_id = ? WHERE dedupe_key = ?",
+                (cluster_id, row["dedupe_key"]),
+            )
 
-        inserted = len(unique_records) - len(existing_keys)
-        updated = len(unique_records) - inserted
-        return {"received": len(records), "inserted": inserted, "updated": updated}
+    # Recalcula el SimHash de toda la tabla y rearma los grupos desde cero en orden de llegada.
+    # Hace falta cuando cambia el formato del SimHash: los hashes viejos no se comparan con los nuevos.
+    def _rebuild_clusters(self, conn: sqlite3.Connection) -> int:
+        rows = conn.execute("SELECT dedupe_key, title, summary, content FROM linkedin_results").fetchall()
+        conn.executemany(
+            "UPDATE linkedin_results SET simhash = ?, cluster_id = NULL WHERE dedupe_key = ?",
+            [(record_simhash(dict(row)), row["dedupe_key"]) for row in rows],
+        )
+        pending = conn.execute(
+            "SELECT dedupe_key, source_type, simhash FROM linkedin_results ORDER BY scraped_at, id"
+        ).fetchall()
+        self._cluster_rows(conn, pending)
+        return len(pending)
 
-    def list_results(
+    def rebuild_clusters(self) -> int:
+        with self._connect() as conn:
+            return self._rebuild_clusters(conn)
+
+    def _write_rows(self, conn: sqlite3.Connection, rows: list[NormalizedRow]) -> dict[str, int]:
+        return self._apply_rows(conn, *self._partition_rows(conn, rows))
+
+    def iter_stored(self, batch_size: int = 1000) -> Iterator[list[dict[str, Any]]]:
+        last_id = 0
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT * FROM linkedin_results WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1]["id"]
+            yield [dict(row) for row in rows]
+
+    def update_enrichment(self, rows: list[dict[str, Any]]) -> None:
+        columns = (*ENRICHED_FIELDS, "content_hash")
+        with self._connect() as conn:
+            conn.executemany(
+                f"UPDATE linkedin_results SET {', '.join(f'{column}=?' for column in columns)} WHERE dedupe_key = ?",
+                [(*(row.get(column) for column in columns), row["dedupe_key"]) for row in rows],
+            )
+
+    def _where_clause(
         self,
-        limit: int = 200,
-        source_type: str | None = None,
-        search_text: str | None = None,
-    ) -> list[dict[str, Any]]:
+        source_type: str | None,
+        search_text: str | None,
+        **filters: str | None,
+    ) -> tuple[str, list[Any]]:
         clauses = []
         params: list[Any] = []
 
@@ -126,7 +349,21 @@ class SQLiteRepository(BaseRepository):
             clauses.append("source_type = ?")
             params.append(source_type)
 
-        if search_text:
+        for column in EXACT_FILTERS:
+            value = (filters.get(column) or "").strip()
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+
+        since, before = resolve_date_range(filters.get("date_from"), filters.get("date_to"))
+        if since:
+            clauses.append("scraped_at >= ?")
+            params.append(since)
+        if before:
+            clauses.append("scraped_at < ?")
+            params.append(before)
+
+        if search_text and search_text.strip():
             needle = f"%{search_text.strip()}%"
             clauses.append(
                 "(" + " OR ".join(
@@ -142,9 +379,138 @@ class SQLiteRepository(BaseRepository):
             params.extend([needle] * 5)
 
         where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
-        sql = f"SELECT * FROM linkedin_results {where_sql} ORDER BY scraped_at DESC LIMIT ?"
-        params.append(max(1, min(limit, 1000)))
+        return where_sql, params
+
+    def list_results(
+        self,
+        limit: int = 200,
+        source_type: str | None = None,
+        search_text: str | None = None,
+        *,
+        offset: int = 0,
+        seniority: str | None = None,
+        apply_type: str | None = None,
+        keyword: str | None = None,
+        company: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        collapse: bool = False,
+    ) -> list[dict[str, Any]]:
+        where_sql, params = self._where_clause(
+            source_type,
+            search_text,
+            seniority=seniority,
+            apply_type=apply_type,
+            keyword=keyword,
+            company=company,
+            date_from=date_from,
+            date_to=date_to,
+        )
+        sql = self._select_sql(where_sql, collapse) + " LIMIT ? OFFSET ?"
+        params.extend([max(1, min(limit, 1000)), max(0, offset)])
 
         with self._connect() as conn:
             rows = conn.execute(sql, params).fetchall()
-        return [dict(row) for row in rows]
+        return self._result_dicts(rows)
+
+    def iter_results(
+        self,
+        batch_size: int = 1000,
+        source_type: str | None = None,
+        search_text: str | None = None,
+        *,
+        seniority: str | None = None,
+        apply_type: str | None = None,
+        keyword: str | None = None,
+        company: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        collapse: bool = False,
+    ) -> Iterator[list[dict[str, Any]]]:
+        where_sql, params = self._where_clause(
+            source_type,
+            search_text,
+            seniority=seniority,
+            apply_type=apply_type,
+            keyword=keyword,
+            company=company,
+            date_from=date_from,
+            date_to=date_to,
+        )
+        # Una sola consulta leída con fetchmany: el cursor avanza sobre el índice sin OFFSET y la
+        # lectura ve una foto consistente aunque el scraper escriba mientras tanto (WAL, ver _init_db).
+        conn = self._connect()
+        try:
+            cursor = conn.execute(self._select_sql(where_sql, collapse), params)
+            while rows := cursor.fetchmany(max(1, batch_size)):
+                yield self._result_dicts(rows)
+        finally:
+            conn.close()
+
+    def _select_sql(self, where_sql: str, collapse: bool) -> str:
+        if not collapse:
+            return f"SELECT * FROM linkedin_results {where_sql} ORDER BY scraped_at DESC, id DESC"
+        # Un registro por grupo de casi duplicados (el más reciente que pasa los filtros) con
+        # el tamaño del grupo; filas anteriores al índice cuentan como grupo propio.
+        return f"""
+            SELECT * FROM (
+                SELECT *,
+                    COUNT(*) OVER cluster AS cluster_size,
+                    ROW_NUMBER() OVER (cluster ORDER BY scraped_at DESC, id DESC) AS cluster_rank
+                FROM linkedin_results {where_sql}
+                WINDOW cluster AS (PARTITION BY COALESCE(cluster_id, dedupe_key))
+            )
+            WHERE cluster_rank = 1
+            ORDER BY scraped_at DESC, id DESC
+        """
+
+    def _result_dicts(self, rows: list[sqlite3.Row]) -> list[dict[str, Any]]:
+        results = [dict(row) for row in rows]
+        for item in results:
+            item.pop("cluster_rank", None)
+        return results
+
+    def facet_results(
+        self,
+        source_type: str | None = None,
+        search_text: str | None = None,
+        fields: tuple[str, ...] = FACET_FIELDS,
+        top: int = 10,
+        *,
+        seniority: str | None = None,
+        apply_type: str | None = None,
+        keyword: str | None = None,
+        company: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> dict[str, Any]:
+        where_sql, params = self._where_clause(
+            source_type,
+            search_text,
+            seniority=seniority,
+            apply_type=apply_type,
+            keyword=keyword,
+            company=company,
+            date_from=date_from,
+            date_to=date_to,
+        )
+        top = max(1, min(top, 100))
+        facets: dict[str, Any] = {}
+
+        with self._connect() as conn:
+            facets["total"] = conn.execute(f"SELECT COUNT(*) FROM linkedin_results {where_sql}", params).fetchone()[0]
+            for field in fields:
+                expression = FACET_EXPRESSIONS[field]
+                order_sql = "value DESC" if field == "day" else "count DESC, value"
+                rows = conn.execute(
+                    f"""
+                    SELECT {expression} AS value, COUNT(*) AS count
+                    FROM linkedin_results {where_sql}
+                    GROUP BY {expression}
+                    ORDER BY {order_sql}
+                    LIMIT ?
+                    """,
+                    [*params, FACET_LIMITS.get(field, top)],
+                ).fetchall()
+                facets[field] = [{"value": row["value"], "count": row["count"]} for row in rows]
+        return facets
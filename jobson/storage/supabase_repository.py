@@ -1,90 +1,128 @@
 from __future__ import annotations
 
+from collections.abc import Iterator
 from typing import Any
 
-import requests
-
-from jobson.models import normalize_record
-from jobson.storage.base import BaseRepository
+from jobson.models import NormalizedRow, ScrapedRecord, normalize_record
+from jobson.similarity import record_simhash
+from jobson.storage.base import EXACT_FILTERS, FACET_FIELDS, BaseRepository, resolve_date_range
+from jobson.storage.transport import HttpTransport, TransportConfig
 
 
 class SupabaseRepository(BaseRepository):
-    def __init__(self, url: str, key: str, table: str):
+    def __init__(self, url: str, key: str, table: str, transport_config: TransportConfig | None = None):
         self.url = url.rstrip("/")
         self.key = key
         self.table = table
         self.endpoint = f"{self.url}/rest/v1/{self.table}"
-        self.session = requests.Session()
-        self.session.headers.update(
+        self.facets_endpoint = f"{self.url}/rest/v1/rpc/{self.table}_facets"
+        self.ingest_endpoint = f"{self.url}/rest/v1/rpc/{self.table}_ingest"
+        self.collapsed_endpoint = f"{self.url}/rest/v1/rpc/{self.table}_collapsed"
+        self.set_simhash_endpoint = f"{self.url}/rest/v1/rpc/{self.table}_set_simhash"
+        self.assign_clusters_endpoint = f"{self.url}/rest/v1/rpc/{self.table}_assign_clusters"
+        self.transport = HttpTransport(
             {
                 "apikey": self.key,
                 "Authorization": f"Bearer {self.key}",
                 "Content-Type": "application/json",
                 "Accept": "application/json",
-            }
+            },
+            transport_config,
         )
 
     @property
     def backend_name(self) -> str:
         return "supabase"
 
-    def _get_existing_keys(self, keys: list[str]) -> set[str]:
-        existing: set[str] = set()
-        chunk_size = 120
-
-        for index in range(0, len(keys), chunk_size):
-            chunk = keys[index:index + chunk_size]
-            in_filter = f"({','.join(chunk)})"
-            response = self.session.get(
-                self.endpoint,
-                params={"select": "dedupe_key", "dedupe_key": f"in.{in_filter}"},
-                timeout=30,
-            )
-            response.raise_for_status()
-            for row in response.json():
-                dedupe_key = row.get("dedupe_key")
-                if dedupe_key:
-                    existing.add(dedupe_key)
-        return existing
-
-    def upsert_results(self, records: list[dict[str, Any]], keyword: str, search_mode: str) -> dict[str, int]:
+    def metrics(self) -> dict[str, Any]:
+        return {"http": self.transport.stats.snapshot()}
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+    def after_fork(self) -> None:
+        self.transport.reset()
+
+    def _unique_records(self, records: list[ScrapedRecord], keyword: str, search_mode: str) -> dict[str, NormalizedRow]:
         normalized = [normalize_record(record, keyword, search_mode) for record in records]
-        unique_records = {item["dedupe_key"]: item for item in normalized}
+        return {item.dedupe_key: item for item in normalized}
+
+    # La función linkedin_results_ingest (supabase/schema.sql) inserta los nuevos, reescribe solo
+    # los que cambiaron de content_hash, adelanta last_seen_at del resto y registra los hits de
+    # palabra clave. Es idempotente: reintentarla tras un 503 no duplica nada.
+    def _ingest_request(
+        self, rows: list[dict[str, Any]], hits: list[dict[str, Any]] | None
+    ) -> dict[str, Any]:
+        return {
+            "json_body": {"p_rows": rows, "p_hits": hits},
+            "timeout": 60,
+            "idempotent": True,
+        }
+
+    def _ingest_counts(self, counts: dict[str, Any]) -> dict[str, int]:
+        return {key: int(counts.get(key, 0)) for key in ("inserted", "updated", "unchanged")}
+
+    def upsert_results(self, records: list[ScrapedRecord], keyword: str, search_mode: str) -> dict[str, int]:
+        unique_records = self._unique_records(records, keyword, search_mode)
 
         if not unique_records:
-            return {"received": 0, "inserted": 0, "updated": 0}
+            return {"received": 0, "inserted": 0, "updated": 0, "unchanged": 0}
 
-        keys = list(unique_records.keys())
-        existing_keys = self._get_existing_keys(keys)
+        counts = self.upsert_normalized([row._asdict() for row in unique_records.values()])
+        return {"received": len(records), **counts}
 
-        response = self.session.post(
-            self.endpoint,
-            params={"on_conflict": "dedupe_key"},
-            headers={"Prefer": "resolution=merge-duplicates,return=representation"},
-            json=list(unique_records.values()),
-            timeout=60,
-        )
-        response.raise_for_status()
+    async def aupsert_results(self, records: list[ScrapedRecord], keyword: str, search_mode: str) -> dict[str, int]:
+        unique_records = self._unique_records(records, keyword, search_mode)
 
-        inserted = len(unique_records) - len(existing_keys)
-        updated = len(unique_records) - inserted
-        return {"received": len(records), "inserted": inserted, "updated": updated}
+        if not unique_records:
+            return {"received": 0, "inserted": 0, "updated": 0, "unchanged": 0}
 
-    def list_results(
+        counts = await self.aupsert_normalized([row._asdict() for row in unique_records.values()])
+        return {"received": len(records), **counts}
+
+    def upsert_normalized(
+        self, rows: list[dict[str, Any]], hits: list[dict[str, Any]] | None = None
+    ) -> dict[str, int]:
+        response = self.transport.request("POST", self.ingest_endpoint, **self._ingest_request(rows, hits))
+        return self._ingest_counts(response.json())
+
+    async def aupsert_normalized(
+        self, rows: list[dict[str, Any]], hits: list[dict[str, Any]] | None = None
+    ) -> dict[str, int]:
+        response = await self.transport.arequest("POST", self.ingest_endpoint, **self._ingest_request(rows, hits))
+        return self._ingest_counts(response.json())
+
+    def _list_params(
         self,
-        limit: int = 200,
-        source_type: str | None = None,
-        search_text: str | None = None,
-    ) -> list[dict[str, Any]]:
+        limit: int,
+        source_type: str | None,
+        search_text: str | None,
+        offset: int = 0,
+        **filters: str | None,
+    ) -> dict[str, Any]:
         params: dict[str, Any] = {
             "select": "*",
-            "order": "scraped_at.desc",
+            "order": "scraped_at.desc,id.desc",
             "limit": max(1, min(limit, 1000)),
         }
+        if offset > 0:
+            params["offset"] = offset
 
         if source_type:
             params["source_type"] = f"eq.{source_type}"
 
+        for column in EXACT_FILTERS:
+            value = (filters.get(column) or "").strip()
+            if value:
+                params[column] = f"eq.{value}"
+
+        since, before = resolve_date_range(filters.get("date_from"), filters.get("date_to"))
+        date_clauses = [f"scraped_at.gte.{since}"] if since else []
+        if before:
+            date_clauses.append(f"scraped_at.lt.{before}")
+        if date_clauses:
+            params["and"] = f"({','.join(date_clauses)})"
+
         if search_text and search_text.strip():
             query = search_text.strip().replace("%", "")
             params[
@@ -93,7 +131,203 @@ class SupabaseRepository(BaseRepository):
                 f"(title.ilike.*{query}*,company.ilike.*{query}*,author.ilike.*{query}*,"
                 f"summary.ilike.*{query}*,content.ilike.*{query}*)"
             )
+        return params
+
+    # Agrupado en Postgres (función linkedin_results_collapsed de supabase/schema.sql): filtra
+    # primero y agrupa después, igual que SQLiteRepository._select_sql.
+    def _collapsed_body(
+        self,
+        limit: int,
+        source_type: str | None,
+        search_text: str | None,
+        offset: int = 0,
+        **filters: str | None,
+    ) -> dict[str, Any]:
+        since, before = resolve_date_range(filters.get("date_from"), filters.get("date_to"))
+        return {
+            "p_source_type": source_type or None,
+            "p_search": (search_text or "").strip().replace("%", "") or None,
+            **{f"p_{column}": (filters.get(column) or "").strip() or None for column in EXACT_FILTERS},
+            "p_since": since,
+            "p_before": before,
+            "p_limit": max(1, min(limit, 1000)),
+            "p_offset": max(0, offset),
+        }
+
+    def _fetch_after(
+        self,
+        column: str,
+        value: str | None,
+        row_id: str | None,
+        limit: int,
+    ) -> list[dict[str, Any]]:
+        # Paginación por (columna, id): un upsert por lotes deja muchas filas con la misma marca de tiempo.
+        params: dict[str, Any] = {"select": "*", "order": f"{column}.asc,id.asc", "limit": limit}
+        if value:
+            params["or"] = (
+                f'({column}.gt."{value}",'
+                f'and({column}.eq."{value}",id.gt.{row_id or "00000000-0000-0000-0000-000000000000"}))'
+            )
+        return self.transport.request("GET", self.endpoint, params=params).json()
+
+    def fetch_created_after(
+        self,
+        created_at: str | None,
+        row_id: str | None,
+        limit: int = 1000,
+    ) -> list[dict[str, Any]]:
+        return self._fetch_after("created_at", created_at, row_id, limit)
+
+    # Filas nuevas o modificadas (updated_at lo mantiene un trigger en supabase/schema.sql).
+    def fetch_updated_after(
+        self,
+        updated_at: str | None,
+        row_id: str | None,
+        limit: int = 1000,
+    ) -> list[dict[str, Any]]:
+        return self._fetch_after("updated_at", updated_at, row_id, limit)
+
+    def iter_stored(self, batch_size: int = 1000) -> Iterator[list[dict[str, Any]]]:
+        created_at: str | None = None
+        row_id: str | None = None
+        while True:
+            rows = self.fetch_created_after(created_at, row_id, limit=max(1, min(batch_size, 1000)))
+            if not rows:
+                return
+            created_at, row_id = rows[-1]["created_at"], rows[-1]["id"]
+            yield rows
+
+    def update_enrichment(self, rows: list[dict[str, Any]]) -> None:
+        # Con content_hash distinto, la ingesta reescribe el contenido sin tocar keyword/search_mode;
+        # hits vacío para no registrar una búsqueda que no ocurrió.
+        payload = [{key: value for key, value in row.items() if key not in {"id", "created_at"}} for row in rows]
+        self.upsert_normalized(payload, hits=[])
+
+    # El SimHash se calcula acá (Postgres no tokeniza igual); la base lo guarda, deja las filas sin
+    # grupo y las reagrupa en tandas para que ninguna llamada pase el timeout.
+    def rebuild_clusters(self) -> int:
+        for rows in self.iter_stored():
+            hashes = [{"dedupe_key": row["dedupe_key"], "simhash": record_simhash(row)} for row in rows]
+            self.transport.request(
+                "POST", self.set_simhash_endpoint, json_body={"p_rows": hashes}, timeout=60, idempotent=True
+            )
+        total = 0
+        while True:
+            response = self.transport.request(
+                "POST", self.assign_clusters_endpoint, json_body={"p_limit": 2000}, timeout=60, idempotent=True
+            )
+            assigned = int(response.json())
+            if not assigned:
+                return total
+            total += assigned
 
-        response = self.session.get(self.endpoint, params=params, timeout=30)
-        response.raise_for_status()
+    def list_results(
+        self,
+        limit: int = 200,
+        source_type: str | None = None,
+        search_text: str | None = None,
+        *,
+        offset: int = 0,
+        seniority: str | None = None,
+        apply_type: str | None = None,
+        keyword: str | None = None,
+        company: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        collapse: bool = False,
+    ) -> list[dict[str, Any]]:
+        filters = {
+            "seniority": seniority,
+            "apply_type": apply_type,
+            "keyword": keyword,
+            "company": company,
+            "date_from": date_from,
+            "date_to": date_to,
+        }
+        if collapse:
+            body = self._collapsed_body(limit, source_type, search_text, offset=offset, **filters)
+            return self.transport.request("POST", self.collapsed_endpoint, json_body=body, idempotent=True).json()
+        params = self._list_params(limit, source_type, search_text, offset=offset, **filters)
+        return self.transport.request("GET", self.endpoint, params=params).json()
+
+    def iter_results(
+        self,
+        batch_size: int = 1000,
+        source_type: str | None = None,
+        search_text: str | None = None,
+        *,
+        collapse: bool = False,
+        **filters: Any,
+    ) -> Iterator[list[dict[str, Any]]]:
+        if collapse:
+            body = self._collapsed_body(batch_size, source_type, search_text, **filters)
+            while True:
+                rows = self.transport.request("POST", self.collapsed_endpoint, json_body=body, idempotent=True).json()
+                if not rows:
+                    return
+                yield rows
+                if len(rows) < body["p_limit"]:
+                    return
+                body.update(p_after_scraped_at=rows[-1]["scraped_at"], p_after_id=rows[-1]["id"])
+
+        params = self._list_params(batch_size, source_type, search_text, **filters)
+        date_clauses = params.get("and", "()")[1:-1]
+        while True:
+            rows = self.transport.request("GET", self.endpoint, params=params).json()
+            if not rows:
+                return
+            yield rows
+            if len(rows) < params["limit"]:
+                return
+            # Paginación por (scraped_at, id) en el mismo orden descendente: con OFFSET cada página
+            # obliga a Postgres a recorrer de nuevo todas las anteriores. Va dentro de "and" porque
+            # "or" ya lo ocupa la búsqueda de texto.
+            scraped_at, row_id = rows[-1]["scraped_at"], rows[-1]["id"]
+            keyset = f'or(scraped_at.lt."{scraped_at}",and(scraped_at.eq."{scraped_at}",id.lt.{row_id}))'
+            params["and"] = f"({','.join(filter(None, (date_clauses, keyset)))})"
+
+    async def alist_results(self, limit: int = 200, **filters: Any) -> list[dict[str, Any]]:
+        source_type = filters.pop("source_type", None)
+        search_text = filters.pop("search_text", None)
+        if filters.pop("collapse", False):
+            body = self._collapsed_body(limit, source_type, search_text, **filters)
+            response = await self.transport.arequest("POST", self.collapsed_endpoint, json_body=body, idempotent=True)
+            return response.json()
+        params = self._list_params(limit, source_type, search_text, **filters)
+        response = await self.transport.arequest("GET", self.endpoint, params=params)
+        return response.json()
+
+    def facet_results(
+        self,
+        source_type: str | None = None,
+        search_text: str | None = None,
+        fields: tuple[str, ...] = FACET_FIELDS,
+        top: int = 10,
+        *,
+        seniority: str | None = None,
+        apply_type: str | None = None,
+        keyword: str | None = None,
+        company: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> dict[str, Any]:
+        since, before = resolve_date_range(date_from, date_to)
+        # Agregación en Postgres (función definida en supabase/schema.sql): una sola llamada.
+        response = self.transport.request(
+            "POST",
+            self.facets_endpoint,
+            json_body={
+                "p_source_type": source_type or None,
+                "p_search": (search_text or "").strip() or None,
+                "p_fields": list(fields),
+                "p_top": max(1, min(top, 100)),
+                "p_seniority": (seniority or "").strip() or None,
+                "p_apply_type": (apply_type or "").strip() or None,
+                "p_keyword": (keyword or "").strip() or None,
+                "p_company": (company or "").strip() or None,
+                "p_since": since,
+                "p_before": before,
+            },
+            idempotent=True,
+        )
         return response.json()
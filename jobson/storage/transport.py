@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# Un 400 solo cuenta como rechazo de gzip si el cuerpo habla de la codificación o de un JSON
+# ilegible (PGRST102): el JSON que enviamos siempre es válido, así que no se descomprimió.
+GZIP_ERROR_PATTERN = re.compile(r"gzip|content-encoding|decod|compress|PGRST102|invalid json", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class TransportConfig:
+    pool_size: int = 10
+    max_retries: int = 4
+    backoff_base: float = 0.5
+    backoff_max: float = 20.0
+    gzip_min_bytes: int = 64 * 1024
+    timeout: float = 30.0
+
+
+class LatencyStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._by_method: dict[str, dict[str, float]] = {}
+
+    def record(self, method: str, seconds: float, attempts: int, ok: bool) -> None:
+        with self._lock:
+            entry = self._by_method.setdefault(
+                method,
+                {"requests": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0},
+            )
+            elapsed_ms = seconds * 1000
+            entry["requests"] += 1
+            entry["retries"] += attempts - 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            if not ok:
+                entry["errors"] += 1
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            snapshot = {}
+            for method, entry in self._by_method.items():
+                item = dict(entry)
+                item["avg_ms"] = round(entry["total_ms"] / entry["requests"], 1) if entry["requests"] else 0.0
+                item["total_ms"] = round(entry["total_ms"], 1)
+                item["max_ms"] = round(entry["max_ms"], 1)
+                snapshot[method] = item
+            return snapshot
+
+
+_SCOPED_STATS: ContextVar[LatencyStats | None] = ContextVar("jobson_scoped_stats", default=None)
+
+
+# Mide solo las requests hechas dentro del bloque: las tareas y los hilos de asyncio.to_thread que
+# se lanzan ahí heredan el contexto, así cada búsqueda ve sus propias latencias aunque varias
+# compartan el transporte. Las del hilo de replicación del spool no cuentan: no son de la búsqueda.
+@contextmanager
+def track_requests() -> Iterator[LatencyStats]:
+    stats = LatencyStats()
+    token = _SCOPED_STATS.set(stats)
+    try:
+        yield stats
+    finally:
+        _SCOPED_STATS.reset(token)
+
+
+# Misma política (pool, reintentos con backoff+jitter, gzip, latencias) para requests y httpx.
+class HttpTransport:
+    def __init__(self, headers: dict[str, str], config: TransportConfig | None = None):
+        self.headers = dict(headers)
+        self.config = config or TransportConfig()
+        self.stats = LatencyStats()
+        self._gzip_enabled = self.config.gzip_min_bytes > 0
+
+        self.reset()
+
+    def _record(self, method: str, seconds: float, attempts: int, ok: bool) -> None:
+        self.stats.record(method, seconds, attempts, ok)
+        scoped = _SCOPED_STATS.get()
+        if scoped is not None:
+            scoped.record(method, seconds, attempts, ok)
+
+    def reset(self) -> None:
+        # Pool nuevo: tras un fork, los sockets del padre no deben reutilizarse en el hijo.
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=self.config.pool_size,
+            pool_maxsize=self.config.pool_size,
+            max_retries=0,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._async_client: httpx.AsyncClient | None = None
+        self._async_loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # httpx ata sus conexiones al event loop que las creó; Flask y la CLI usan asyncio.run
+        # por búsqueda, así que se abre un pool nuevo cuando cambia el loop.
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = httpx.AsyncClient(
+                headers=self.headers,
+                limits=httpx.Limits(
+                    max_connections=self.config.pool_size,
+                    max_keepalive_connections=self.config.pool_size,
+                ),
+                timeout=httpx.Timeout(self.config.timeout),
+            )
+            self._async_loop = loop
+        return self._async_client
+
+    async def aclose(self) -> None:
+        client = self._async_client
+        self._async_client = None
+        self._async_loop = None
+        if client is not None:
+            await client.aclose()
+
+    def _encode_body(self, payload: Any, headers: dict[str, str]) -> bytes | None:
+        if payload is None:
+            return None
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        headers["Content-Type"] = "application/json"
+        if self._gzip_enabled and len(body) >= self.config.gzip_min_bytes:
+            headers["Content-Encoding"] = "gzip"
+            return gzip.compress(body, compresslevel=5)
+        return body
+
+    def _should_retry(self, status: int | None, attempt: int, idempotent: bool) -> bool:
+        if not idempotent or attempt >= self.config.max_retries:
+            return False
+        return status is None or status in RETRY_STATUSES
+
+    def _backoff(self, attempt: int, retry_after: str | None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.config.backoff_max)
+            except ValueError:
+                pass
+        ceiling = min(self.config.backoff_max, self.config.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def _rejects_gzip(self, response: requests.Response | httpx.Response, headers: dict[str, str]) -> bool:
+        # Si el servidor no acepta cuerpos comprimidos, se desactiva gzip y se reenvía plano. Los
+        # demás 400 (restricciones, datos inválidos) son errores de la fila, no de la compresión.
+        if headers.get("Content-Encoding") != "gzip":
+            return False
+        status = response.status_code
+        if status != 415 and not (status == 400 and GZIP_ERROR_PATTERN.search(response.text)):
+            return False
+        logger.warning("El servidor rechazó un cuerpo gzip (HTTP %s); se desactiva la compresión.", status)
+        self._gzip_enabled = False
+        return True
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: dict[str, Any] | None = None,
+        json_body: Any = None,
+        headers: dict[str, str] | None = None,
+        timeout: float | None = None,
+        idempotent: bool | None = None,
+    ) -> requests.Response:
+        method = method.upper()
+        idempotent = method in IDEMPOTENT_METHODS if idempotent is None else idempotent
+        started = time.perf_counter()
+        attempt = 0
+
+        while True:
+            request_headers = dict(headers or {})
+            body = self._encode_body(json_body, request_headers)
+            try:
+                response = self.session.request(
+                    method,
+                    url,
+                    params=params,
+                    data=body,
+                    headers=request_headers,
+                    timeout=timeout or self.config.timeout,
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                if not self._should_retry(None, attempt, idempotent):
+                    self._record(method, time.perf_counter() - started, attempt + 1, ok=False)
+                    raise
+                time.sleep(self._backoff(attempt, None))
+                attempt += 1
+                continue
+
+            if self._rejects_gzip(response, request_headers):
+                continue
+            if self._should_retry(response.status_code, attempt, idempotent):
+                delay = self._backoff(attempt, response.headers.get("Retry-After"))
+                logger.info("%s %s -> HTTP %s, reintento en %.1fs", method, url, response.status_code, delay)
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            self._record(method, time.perf_counter() - started, attempt + 1, ok=response.ok)
+            response.raise_for_status()
+            return response
+
+    async def arequest(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: dict[str, Any] | None = None,
+        json_body: Any = None,
+        headers: dict[str, str] | None = None,
+        timeout: float | None = None,
+        idempotent: bool | None = None,
+    ) -> httpx.Response:
+        method = method.upper()
+        idempotent = method in IDEMPOTENT_METHODS if idempotent is None else idempotent
+        client = self._get_client()
+        started = time.perf_counter()
+        attempt = 0
+
+        while True:
+            request_headers = dict(headers or {})
+            body = self._encode_body(json_body, request_headers)
+            try:
+                response = await client.request(
+                    method,
+                    url,
+                    params=params,
+                    content=body,
+                    headers=request_headers,
+                    timeout=timeout or self.config.timeout,
+                )
+            except httpx.TransportError:
+                if not self._should_retry(None, attempt, idempotent):
+                    self._record(method, time.perf_counter() - started, attempt + 1, ok=False)
+                    raise
+                await asyncio.sleep(self._backoff(attempt, None))
+                attempt += 1
+                continue
+
+            if self._rejects_gzip(response, request_headers):
+                continue
+            if self._should_retry(response.status_code, attempt, idempotent):
+                delay = self._backoff(attempt, response.headers.get("Retry-After"))
+                logger.info("%s %s -> HTTP %s, reintento en %.1fs", method, url, response.status_code, delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            self._record(method, time.perf_counter() - started, attempt + 1, ok=response.is_success)
+            response.raise_for_status()
+            return response
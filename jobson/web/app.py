@@ -1,33 +1,87 @@
 from __future__ import annotations
 
 import asyncio
+import itertools
+import threading
+from datetime import UTC, datetime
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, Response, jsonify, render_template, request, stream_with_context
 
 from jobson.config import Settings, load_settings
-from jobson.scraper.linkedin import LinkedInScraper
-from jobson.service import SearchService
-from jobson.storage.base import BaseRepository
+from jobson.export import EXPORT_MEDIA_TYPES, check_format, iter_export
+from jobson.storage.base import EXACT_FILTERS, FACET_FIELDS, BaseRepository, resolve_date_range
 from jobson.storage.factory import build_repository
 
-TEMPLATES_DIR = Path(__file__).resolve().parent / "templates"
+if TYPE_CHECKING:
+    from jobson.service import SearchService
 
+TEMPLATES_DIR = Path(__file__).resolve().parent / "templates"
 
-def build_service(settings: Settings) -> tuple[SearchService, BaseRepository]:
-    repository = build_repository(settings)
-    scraper = LinkedInScraper(settings.storage_state_path)
-    service = SearchService(scraper=scraper, repository=repository, data_dir=settings.data_dir)
-    return service, repository
+DB_READ_ERROR = (
+    "No se pudo leer desde la base de datos. "
+    "Revisa SUPABASE_URL, SUPABASE_KEY y permisos de la tabla."
+)
+
+
+def read_result_filters(args) -> dict[str, str | None]:
+    mode = (args.get("mode") or "all").strip().lower()
+    filters: dict[str, str | None] = {
+        "source_type": mode if mode in {"jobs", "feed"} else None,
+        "search_text": (args.get("q") or "").strip(),
+    }
+    for name in EXACT_FILTERS:
+        filters[name] = (args.get(name) or "").strip() or None
+    filters["date_from"] = (args.get("from") or "").strip() or None
+    filters["date_to"] = (args.get("to") or "").strip() or None
+    # Valida el formato aquí para responder 400 en vez de fallar dentro del backend.
+    resolve_date_range(filters["date_from"], filters["date_to"])
+    return filters
+
+
+def build_service(settings: Settings, repository: BaseRepository) -> SearchService:
+    # Playwright y el scraper se importan solo al primer scraping: el visor nunca los carga.
+    from jobson.enrichment import EnrichmentStage
+    from jobson.scraper.linkedin import LinkedInScraper
+    from jobson.scraper.ratelimit import AdaptiveRateLimiter
+    from jobson.service import SearchService
+
+    scraper = LinkedInScraper(
+        settings.storage_state_path,
+        har_mode=settings.har_mode,
+        har_path=settings.har_path,
+        session_ttl_seconds=settings.session_ttl_hours * 3600,
+        rate_limiter=AdaptiveRateLimiter(
+            settings.scraper_rate,
+            min_rate=settings.scraper_min_rate,
+            max_rate=settings.scraper_max_rate,
+        ),
+        checkpoint_dir=settings.checkpoints_dir,
+        parallel_pages=settings.jobs_parallel_pages,
+    )
+    return SearchService(
+        scraper=scraper,
+        repository=repository,
+        data_dir=settings.data_dir,
+        enrichment=EnrichmentStage(workers=settings.enrichment_workers),
+    )
 
 
 def create_app(settings: Settings | None = None) -> Flask:
     settings = settings or load_settings()
-    service, repository = build_service(settings)
+    repository = build_repository(settings)
 
     app = Flask(__name__, template_folder=str(TEMPLATES_DIR))
-    app.config["service"] = service
+    app.config["service"] = None
     app.config["repository"] = repository
+    service_lock = threading.Lock()
+
+    def get_service() -> SearchService:
+        with service_lock:
+            if app.config["service"] is None:
+                app.config["service"] = build_service(settings, repository)
+            return app.config["service"]
 
     @app.get("/")
     def index():
@@ -41,38 +95,95 @@ def create_app(settings: Settings | None = None) -> Flask:
     def get_results():
         repo: BaseRepository = app.config["repository"]
 
-        mode = (request.args.get("mode") or "all").strip().lower()
-        query = (request.args.get("q") or "").strip()
         limit_raw = request.args.get("limit") or "200"
+        offset_raw = request.args.get("offset") or "0"
 
         try:
             limit = int(limit_raw)
+            offset = max(0, int(offset_raw))
         except ValueError:
-            return jsonify({"error": "limit debe ser número"}), 400
+            return jsonify({"error": "limit y offset deben ser números"}), 400
 
-        source_type = mode if mode in {"jobs", "feed"} else None
         try:
-            rows = repo.list_results(limit=limit, source_type=source_type, search_text=query)
+            filters = read_result_filters(request.args)
+        except ValueError:
+            return jsonify({"error": "Las fechas deben tener formato YYYY-MM-DD."}), 400
+        # collapse=1: un registro por grupo de casi duplicados, con cluster_size.
+        collapse = (request.args.get("collapse") or "").strip().lower() in {"1", "true", "yes"}
+
+        try:
+            rows = repo.list_results(limit=limit, offset=offset, collapse=collapse, **filters)
         except Exception as exc:
-            return (
-                jsonify(
-                    {
-                        "error": (
-                            "No se pudo leer desde la base de datos. "
-                            "Revisa SUPABASE_URL, SUPABASE_KEY y permisos de la tabla."
-                        ),
-                        "detail": str(exc),
-                    }
-                ),
-                502,
-            )
+            return jsonify({"error": DB_READ_ERROR, "detail": str(exc)}), 502
+
+        # Los totales salen de /api/results/facets, que la interfaz pide en paralelo.
+        return jsonify(
+            {
+                "records": rows,
+                "next_offset": offset + len(rows) if len(rows) >= max(1, min(limit, 1000)) else None,
+            }
+        )
+
+    @app.get("/api/export")
+    def export_results():
+        repo: BaseRepository = app.config["repository"]
+
+        fmt = (request.args.get("format") or "csv").strip().lower()
+        try:
+            check_format(fmt)
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        except RuntimeError as exc:
+            return jsonify({"error": str(exc)}), 501
 
-        summary = {
-            "total": len(rows),
-            "jobs": sum(1 for row in rows if row.get("source_type") == "jobs"),
-            "feed": sum(1 for row in rows if row.get("source_type") == "feed"),
-        }
-        return jsonify({"records": rows, "summary": summary})
+        try:
+            filters = read_result_filters(request.args)
+        except ValueError:
+            return jsonify({"error": "Las fechas deben tener formato YYYY-MM-DD."}), 400
+        collapse = (request.args.get("collapse") or "").strip().lower() in {"1", "true", "yes"}
+
+        # El primer lote se lee antes de responder: un error de conexión vuelve como 502 y no
+        # como una descarga cortada. El resto se transmite lote a lote desde el cursor.
+        batches = repo.iter_results(collapse=collapse, **filters)
+        try:
+            first = next(batches, [])
+        except Exception as exc:
+            return jsonify({"error": DB_READ_ERROR, "detail": str(exc)}), 502
+
+        stamp = datetime.now(UTC).strftime("%Y%m%d_%H%M%S")
+        return Response(
+            stream_with_context(iter_export(itertools.chain([first], batches), fmt, collapse=collapse)),
+            content_type=EXPORT_MEDIA_TYPES[fmt],
+            headers={"Content-Disposition": f'attachment; filename="jobson_{stamp}.{fmt}"'},
+        )
+
+    @app.get("/api/results/facets")
+    def get_facets():
+        repo: BaseRepository = app.config["repository"]
+
+        fields_raw = (request.args.get("fields") or "").strip()
+        top_raw = request.args.get("top") or "10"
+
+        try:
+            top = int(top_raw)
+        except ValueError:
+            return jsonify({"error": "top debe ser número"}), 400
+
+        fields = tuple(field.strip() for field in fields_raw.split(",") if field.strip()) or FACET_FIELDS
+        unknown = [field for field in fields if field not in FACET_FIELDS]
+        if unknown:
+            return jsonify({"error": f"Facetas inválidas: {', '.join(unknown)}"}), 400
+
+        try:
+            filters = read_result_filters(request.args)
+        except ValueError:
+            return jsonify({"error": "Las fechas deben tener formato YYYY-MM-DD."}), 400
+
+        try:
+            facets = repo.facet_results(fields=fields, top=top, **filters)
+        except Exception as exc:
+            return jsonify({"error": DB_READ_ERROR, "detail": str(exc)}), 502
+        return jsonify(facets)
 
     @app.post("/api/search")
     def run_search():
@@ -94,6 +205,7 @@ def create_app(settings: Settings | None = None) -> Flask:
         mode = (payload.get("mode") or "mixed").strip().lower()
         limit_raw = payload.get("limit", 20)
         days_raw = payload.get("days", None)
+        resume = bool(payload.get("resume", False))
 
         if not keywords:
             return jsonify({"error": "Debes escribir palabras clave."}), 400
@@ -119,7 +231,7 @@ def create_app(settings: Settings | None = None) -> Flask:
             except (TypeError, ValueError):
                 return jsonify({"error": "El campo días debe ser entero."}), 400
 
-        service: SearchService = app.config["service"]
+        service = get_service()
 
         try:
             result = asyncio.run(
@@ -128,6 +240,7 @@ def create_app(settings: Settings | None = None) -> Flask:
                     keywords=keywords,
                     limit=limit,
                     days=days,
+                    resume=resume,
                 )
             )
             return jsonify(result)
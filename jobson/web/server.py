@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from typing import Any
+
+from gunicorn.app.base import BaseApplication
+
+from jobson.config import Settings
+from jobson.web.app import create_app
+
+
+class JobsOnServer(BaseApplication):
+    def __init__(self, settings: Settings, options: dict[str, Any]):
+        self.settings = settings
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        return create_app(self.settings)
+
+
+def _post_fork(server, worker) -> None:
+    # Con preload_app la app (y su repositorio) se crea en el maestro antes del fork.
+    app = worker.app.callable
+    if app is not None:
+        app.config["repository"].after_fork()
+
+
+def serve(settings: Settings, port: int | None = None) -> None:
+    options = {
+        "bind": f"{settings.web_host}:{port or settings.web_port}",
+        "workers": settings.web_workers,
+        "threads": settings.web_threads,
+        "worker_class": "gthread",
+        "preload_app": True,
+        "keepalive": settings.web_keepalive,
+        "timeout": settings.web_timeout,
+        "graceful_timeout": settings.web_graceful_timeout,
+        # Reciclado gradual de workers para acotar la memoria en procesos de larga vida.
+        "max_requests": settings.web_max_requests,
+        "max_requests_jitter": max(1, settings.web_max_requests // 10) if settings.web_max_requests else 0,
+        "post_fork": _post_fork,
+        "accesslog": "-",
+    }
+    JobsOnServer(settings, options).run()
@@ -4,15 +4,21 @@ import argparse
 import asyncio
 import logging
 import os
+import sys
 import threading
 import time
 import webbrowser
+from dataclasses import replace
+from pathlib import Path
 
 from jobson.config import Settings, load_settings
-from jobson.scraper.linkedin import LinkedInScraper
+from jobson.enrichment import EnrichmentStage, reenrich_repository
+from jobson.export import EXPORT_MEDIA_TYPES, check_format, iter_export
+from jobson.scraper.ratelimit import AdaptiveRateLimiter
+from jobson.scraper.sessions import SessionPool
 from jobson.service import SearchService
+from jobson.storage.base import resolve_date_range
 from jobson.storage.factory import build_repository
-from jobson.web.app import create_app
 
 
 def configure_logging(settings: Settings) -> None:
@@ -27,10 +33,55 @@ def configure_logging(settings: Settings) -> None:
     )
 
 
+def build_scraper(settings: Settings, session_path: Path | None = None, interactive_login: bool = True):
+    from jobson.scraper.linkedin import LinkedInScraper
+
+    return LinkedInScraper(
+        session_path or settings.storage_state_path,
+        har_mode=settings.har_mode,
+        har_path=settings.har_path,
+        session_ttl_seconds=settings.session_ttl_hours * 3600,
+        interactive_login=interactive_login,
+        checkpoint_dir=settings.checkpoints_dir,
+        parallel_pages=settings.jobs_parallel_pages,
+        rate_limiter=AdaptiveRateLimiter(
+            settings.scraper_rate,
+            min_rate=settings.scraper_min_rate,
+            max_rate=settings.scraper_max_rate,
+        ),
+    )
+
+
 def build_service(settings: Settings) -> SearchService:
     repository = build_repository(settings)
-    scraper = LinkedInScraper(settings.storage_state_path)
-    return SearchService(scraper=scraper, repository=repository, data_dir=settings.data_dir)
+    return SearchService(
+        scraper=build_scraper(settings),
+        repository=repository,
+        data_dir=settings.data_dir,
+        enrichment=EnrichmentStage(workers=settings.enrichment_workers),
+    )
+
+
+def build_session_pool(settings: Settings) -> SessionPool:
+    return SessionPool(
+        settings.sessions_pool_dir,
+        default_session=settings.storage_state_path,
+        max_runs_per_hour=settings.session_max_runs_per_hour,
+        min_interval_seconds=settings.session_min_interval_seconds,
+    )
+
+
+def print_sessions(pool: SessionPool) -> None:
+    sessions = pool.describe()
+    if not sessions:
+        print(f"No hay cuentas en {pool.pool_dir}. Agrega una con --add-session NOMBRE.")
+        return
+    for item in sessions:
+        reason = f" ({item['reason']})" if item["reason"] else ""
+        print(
+            f"{item['name']:<20} {item['status']:<12} corridas/hora: {item['runs_last_hour']:<3} "
+            f"errores: {item['errors']}{reason}"
+        )
 
 
 def print_menu() -> str:
@@ -46,26 +97,156 @@ def print_menu() -> str:
     return input("Selecciona opción (1-5): ").strip()
 
 
-def run_search_sync(service: SearchService, mode: str, keywords: str, limit: int, days: int | None) -> None:
-    result = asyncio.run(service.run_search(mode=mode, keywords=keywords, limit=limit, days=days))
+def run_search_sync(
+    service: SearchService,
+    mode: str,
+    keywords: str,
+    limit: int,
+    days: int | None,
+    resume: bool = False,
+) -> None:
+    result = asyncio.run(service.run_search(mode=mode, keywords=keywords, limit=limit, days=days, resume=resume))
 
     print("\n" + "!" * 60)
     print(f"Scraping completado: {result['scraped_total']} registros")
     print(f"Jobs: {result['scraped_jobs']} | Feed: {result['scraped_feed']}")
     print(
         f"Persistencia -> nuevos: {result['persisted']['inserted']}, "
-        f"duplicados/actualizados: {result['persisted']['updated']}"
+        f"actualizados: {result['persisted']['updated']}, sin cambios: {result['persisted']['unchanged']}"
     )
     if result["csv_path"]:
         print(f"CSV local: {result['csv_path']}")
         print(f"Abrir carpeta: open {os.path.dirname(result['csv_path'])}")
     print(f"Backend de datos: {result['storage_backend']}")
+    rate_limit = result["rate_limit"]
+    print(
+        f"Ritmo final: {rate_limit['rate']} acciones/s | espera total: {rate_limit['waited_seconds']}s | "
+        f"frenos: {rate_limit['throttle_events'] or 'ninguno'}"
+    )
+    print("!" * 60)
+
+
+def run_batch_sync(
+    settings: Settings,
+    batch_file: Path,
+    mode: str,
+    limit: int,
+    days: int | None,
+    max_accounts: int | None,
+    resume: bool = False,
+) -> None:
+    queries = [
+        line.strip()
+        for line in batch_file.read_text(encoding="utf-8").splitlines()
+        if line.strip() and not line.lstrip().startswith("#")
+    ]
+    if not queries:
+        raise SystemExit(f"{batch_file} no contiene búsquedas (una por línea).")
+
+    pool = build_session_pool(settings)
+    service = build_service(settings)
+    try:
+        result = asyncio.run(
+            service.run_batch(
+                queries,
+                mode=mode,
+                limit=limit,
+                days=days,
+                pool=pool,
+                scraper_factory=lambda path: build_scraper(settings, path, interactive_login=False),
+                max_accounts=max_accounts,
+                resume=resume,
+            )
+        )
+    finally:
+        service.repository.close()
+
+    print("\n" + "!" * 60)
+    for item in result["results"]:
+        print(
+            f"[{item['session']}] {item['keywords']}: {item['scraped_total']} registros "
+            f"(nuevos: {item['persisted']['inserted']})"
+        )
+    for item in result["failed"]:
+        print(f"[{item['session']}] {item['keywords']}: ERROR {item['error']}")
+    if result["pending"]:
+        print(f"Sin cuentas sanas para: {', '.join(result['pending'])}")
+    print("-" * 60)
+    print_sessions(pool)
     print("!" * 60)
 
 
+def run_reenrich(settings: Settings) -> None:
+    repository = build_repository(settings)
+    stage = EnrichmentStage(workers=settings.enrichment_workers)
+    try:
+        counts = reenrich_repository(repository, stage)
+        clustered = repository.rebuild_clusters()
+    finally:
+        stage.close()
+        repository.close()
+    print(f"Re-enriquecimiento: {counts['scanned']} registros revisados, {counts['changed']} actualizados.")
+    print(f"Casi duplicados: {clustered} registros reagrupados.")
+
+
+def run_export(
+    settings: Settings,
+    target: str,
+    fmt: str | None,
+    collapse: bool = False,
+    **filters: str | None,
+) -> None:
+    fmt = fmt or Path(target).suffix.lstrip(".").lower() or "csv"
+    try:
+        check_format(fmt)
+    except (ValueError, RuntimeError) as exc:
+        raise SystemExit(str(exc)) from exc
+    try:
+        resolve_date_range(filters.get("date_from"), filters.get("date_to"))
+    except ValueError as exc:
+        raise SystemExit("Las fechas deben tener formato YYYY-MM-DD.") from exc
+
+    repository = build_repository(settings)
+    exported = 0
+
+    def _counted():
+        nonlocal exported
+        for batch in repository.iter_results(collapse=collapse, **filters):
+            exported += len(batch)
+            yield batch
+
+    try:
+        chunks = iter_export(_counted(), fmt, collapse=collapse)
+        if target == "-":
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+        # Se escribe a un temporal y se renombra: una exportación cortada no pisa la anterior.
+        path = Path(target)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        try:
+            with tmp_path.open("wb") as handle:
+                for chunk in chunks:
+                    handle.write(chunk)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        os.replace(tmp_path, path)
+    finally:
+        repository.close()
+    print(f"Exportados {exported} registros a {target} ({fmt}).")
+
+
 def run_cli_interactive(settings: Settings) -> None:
     service = build_service(settings)
+    try:
+        run_cli_menu(settings, service)
+    finally:
+        service.repository.close()
+
 
+def run_cli_menu(settings: Settings, service: SearchService) -> None:
     while True:
         choice = print_menu()
         if choice == "5":
@@ -98,6 +279,8 @@ def run_cli_interactive(settings: Settings) -> None:
 
 
 def launch_web(settings: Settings, auto_open: bool = False, port: int | None = None) -> None:
+    from jobson.web.app import create_app
+
     app = create_app(settings)
     target_port = port or settings.web_port
 
@@ -124,11 +307,111 @@ def main() -> None:
     parser.add_argument("--keywords", type=str, help="Palabras clave")
     parser.add_argument("--limit", type=int, default=20, help="Límite de resultados")
     parser.add_argument("--days", type=int, help="Antigüedad máxima en días")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reanudar la búsqueda desde su último checkpoint en data/checkpoints",
+    )
     parser.add_argument("--port", type=int, help="Puerto para interfaz web")
     parser.add_argument("--open", action="store_true", help="Abrir navegador al lanzar interfaz web")
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Servir la interfaz web con gunicorn (producción, varios workers)",
+    )
+    parser.add_argument("--batch", type=Path, metavar="ARCHIVO", help="Búsquedas por lote (una por línea) repartidas entre las cuentas del pool")
+    parser.add_argument("--max-accounts", type=int, help="Máximo de cuentas en paralelo para --batch")
+    parser.add_argument("--add-session", metavar="NOMBRE", help="Agregar una cuenta al pool (login manual)")
+    parser.add_argument("--release-session", metavar="NOMBRE", help="Sacar una cuenta de cuarentena")
+    parser.add_argument("--sessions", action="store_true", help="Mostrar el estado de las cuentas del pool")
+    parser.add_argument(
+        "--reenrich",
+        action="store_true",
+        help="Recalcular seniority, modalidad, ubicación, salario y tecnologías de toda la tabla",
+    )
+    export_group = parser.add_argument_group("exportación")
+    export_group.add_argument(
+        "--export",
+        metavar="ARCHIVO",
+        help="Exportar los resultados guardados (usa - para stdout)",
+    )
+    export_group.add_argument(
+        "--format",
+        choices=list(EXPORT_MEDIA_TYPES),
+        help="Formato de --export (por defecto según la extensión del archivo)",
+    )
+    export_group.add_argument("--source", choices=["jobs", "feed"], help="Exportar solo jobs o solo feed")
+    export_group.add_argument("--search", metavar="TEXTO", help="Texto a buscar en título, empresa, autor o contenido")
+    export_group.add_argument("--seniority", help="Filtrar por seniority")
+    export_group.add_argument("--apply-type", help="Filtrar por tipo de postulación")
+    export_group.add_argument("--keyword", help="Filtrar por palabra clave de la búsqueda original")
+    export_group.add_argument("--company", help="Filtrar por empresa")
+    export_group.add_argument("--from", dest="date_from", metavar="YYYY-MM-DD", help="Desde (inclusive)")
+    export_group.add_argument("--to", dest="date_to", metavar="YYYY-MM-DD", help="Hasta (inclusive)")
+    export_group.add_argument("--collapse", action="store_true", help="Un registro por grupo de casi duplicados")
+    har_group = parser.add_mutually_exclusive_group()
+    har_group.add_argument("--har-record", type=Path, metavar="HAR", help="Grabar el tráfico de LinkedIn en un HAR")
+    har_group.add_argument("--har-replay", type=Path, metavar="HAR", help="Reproducir un HAR grabado (sin red ni login)")
 
     args = parser.parse_args()
 
+    if args.har_record:
+        settings = replace(settings, har_mode="record", har_path=args.har_record)
+    elif args.har_replay:
+        settings = replace(settings, har_mode="replay", har_path=args.har_replay)
+
+    if args.add_session:
+        pool = build_session_pool(settings)
+        asyncio.run(build_scraper(settings, pool.path_for(args.add_session)).login())
+        print(f"Cuenta {args.add_session} guardada en {pool.path_for(args.add_session)}")
+        return
+
+    if args.release_session:
+        pool = build_session_pool(settings)
+        try:
+            pool.release(args.release_session)
+        except KeyError as exc:
+            raise SystemExit(str(exc)) from exc
+        print_sessions(pool)
+        return
+
+    if args.sessions:
+        print_sessions(build_session_pool(settings))
+        return
+
+    if args.reenrich:
+        run_reenrich(settings)
+        return
+
+    if args.export:
+        run_export(
+            settings,
+            args.export,
+            args.format,
+            collapse=args.collapse,
+            source_type=args.source,
+            search_text=args.search,
+            seniority=args.seniority,
+            apply_type=args.apply_type,
+            keyword=args.keyword,
+            company=args.company,
+            date_from=args.date_from,
+            date_to=args.date_to,
+        )
+        return
+
+    if args.batch:
+        run_batch_sync(
+            settings,
+            args.batch,
+            mode=args.feature or "jobs",
+            limit=max(1, args.limit),
+            days=args.days,
+            max_accounts=args.max_accounts,
+            resume=args.resume,
+        )
+        return
+
     if args.cli and not args.feature:
         run_cli_interactive(settings)
         return
@@ -137,13 +420,23 @@ def main() -> None:
         if not args.keywords:
             raise SystemExit("Debes usar --keywords cuando ejecutas --feature")
         service = build_service(settings)
-        run_search_sync(
-            service,
-            mode=args.feature,
-            keywords=args.keywords,
-            limit=max(1, args.limit),
-            days=args.days,
-        )
+        try:
+            run_search_sync(
+                service,
+                mode=args.feature,
+                keywords=args.keywords,
+                limit=max(1, args.limit),
+                days=args.days,
+                resume=args.resume,
+            )
+        finally:
+            service.repository.close()
+        return
+
+    if args.serve:
+        from jobson.web.server import serve
+
+        serve(settings, port=args.port)
         return
 
     launch_web(settings, auto_open=args.open, port=args.port)
@@ -16,14 +16,441 @@ create table if not exists public.linkedin_results (
   search_mode text not null,
   scraped_at timestamptz not null,
   dedupe_key text not null unique,
-  created_at timestamptz not null default now()
+  content_hash text,
+  last_seen_at timestamptz,
+  work_mode text,
+  location text,
+  salary_min numeric,
+  salary_max numeric,
+  salary_currency text,
+  tech_tags text,
+  simhash bigint,
+  cluster_id text,
+  created_at timestamptz not null default now(),
+  updated_at timestamptz not null default now()
 );
 
 create index if not exists idx_linkedin_results_scraped_at
   on public.linkedin_results (scraped_at desc);
 
-create index if not exists idx_linkedin_results_source_type
-  on public.linkedin_results (source_type);
+-- Índices compuestos (filtro, scraped_at desc) para los filtros de /api/results;
+-- también cubren los GROUP BY de las facetas, por eso reemplazan a los de una sola columna.
+drop index if exists public.idx_linkedin_results_source_type;
+drop index if exists public.idx_linkedin_results_seniority;
+drop index if exists public.idx_linkedin_results_apply_type;
+drop index if exists public.idx_linkedin_results_company;
+drop index if exists public.idx_linkedin_results_keyword;
+
+create index if not exists idx_linkedin_results_source_type_scraped_at
+  on public.linkedin_results (source_type, scraped_at desc);
+
+create index if not exists idx_linkedin_results_seniority_scraped_at
+  on public.linkedin_results (seniority, scraped_at desc);
+
+create index if not exists idx_linkedin_results_apply_type_scraped_at
+  on public.linkedin_results (apply_type, scraped_at desc);
+
+create index if not exists idx_linkedin_results_keyword_scraped_at
+  on public.linkedin_results (keyword, scraped_at desc);
+
+create index if not exists idx_linkedin_results_company_scraped_at
+  on public.linkedin_results (company, scraped_at desc);
+
+create index if not exists idx_linkedin_results_day
+  on public.linkedin_results (((scraped_at at time zone 'UTC')::date));
+
+-- Facetas para el panel de resultados (POST /rest/v1/rpc/linkedin_results_facets).
+-- Devuelve {"total": n, "<campo>": [{"value": ..., "count": ...}, ...]} en una sola llamada.
+drop function if exists public.linkedin_results_facets(text, text, text[], int);
+
+create or replace function public.linkedin_results_facets(
+  p_source_type text default null,
+  p_search text default null,
+  p_fields text[] default array['source_type', 'seniority', 'apply_type', 'company', 'keyword', 'day'],
+  p_top int default 10,
+  p_seniority text default null,
+  p_apply_type text default null,
+  p_keyword text default null,
+  p_company text default null,
+  p_since timestamptz default null,
+  p_before timestamptz default null
+) returns jsonb
+language plpgsql
+stable
+as $$
+declare
+  where_sql text := ' where ($1 is null or source_type = $1)'
+    || ' and ($2 is null or title ilike ''%'' || $2 || ''%'' or company ilike ''%'' || $2 || ''%'''
+    || ' or author ilike ''%'' || $2 || ''%'' or summary ilike ''%'' || $2 || ''%'''
+    || ' or content ilike ''%'' || $2 || ''%'')'
+    || ' and ($3 is null or seniority = $3) and ($4 is null or apply_type = $4)'
+    || ' and ($5 is null or keyword = $5) and ($6 is null or company = $6)'
+    || ' and ($7 is null or scraped_at >= $7) and ($8 is null or scraped_at < $8)';
+  result jsonb;
+  total bigint;
+  bucket jsonb;
+  field text;
+  expr text;
+  order_sql text;
+  bucket_limit int;
+begin
+  execute 'select count(*) from public.linkedin_results' || where_sql
+    into total using p_source_type, p_search, p_seniority, p_apply_type, p_keyword, p_company, p_since, p_before;
+  result := jsonb_build_object('total', total);
+
+  foreach field in array p_fields loop
+    expr := case field
+      when 'source_type' then 'source_type'
+      when 'seniority' then 'seniority'
+      when 'apply_type' then 'apply_type'
+      when 'company' then 'company'
+      when 'keyword' then 'keyword'
+      when 'day' then '((scraped_at at time zone ''UTC'')::date)::text'
+    end;
+    continue when expr is null;
+
+    order_sql := case when field = 'day' then 'value desc' else 'count desc, value' end;
+    bucket_limit := case field when 'day' then 60 when 'source_type' then 10 else least(greatest(p_top, 1), 100) end;
+
+    execute format(
+      'select coalesce(jsonb_agg(jsonb_build_object(''value'', value, ''count'', count) order by %s), ''[]''::jsonb)'
+      ' from (select %s as value, count(*) as count from public.linkedin_results %s group by 1 order by %s limit %s) t',
+      order_sql, expr, where_sql, order_sql, bucket_limit
+    ) into bucket
+      using p_source_type, p_search, p_seniority, p_apply_type, p_keyword, p_company, p_since, p_before;
+
+    result := result || jsonb_build_object(field, bucket);
+  end loop;
+
+  return result;
+end;
+$$;
+
+-- Evitar reescrituras: hash del contenido y última vez visto (tablas creadas antes de esta versión).
+alter table public.linkedin_results add column if not exists content_hash text;
+alter table public.linkedin_results add column if not exists last_seen_at timestamptz;
+
+-- Campos derivados por la etapa de enriquecimiento (jobson/enrichment.py).
+alter table public.linkedin_results add column if not exists work_mode text;
+alter table public.linkedin_results add column if not exists location text;
+alter table public.linkedin_results add column if not exists salary_min numeric;
+alter table public.linkedin_results add column if not exists salary_max numeric;
+alter table public.linkedin_results add column if not exists salary_currency text;
+alter table public.linkedin_results add column if not exists tech_tags text;
+
+-- Última modificación de cada fila, mantenida por trigger: los mirrors de los visores sincronizan
+-- por (updated_at, id) y así reciben también las filas reescritas (contenido nuevo, re-enriquecimiento,
+-- grupos rearmados), no solo las nuevas.
+alter table public.linkedin_results add column if not exists updated_at timestamptz not null default now();
+
+create index if not exists idx_linkedin_results_updated_at
+  on public.linkedin_results (updated_at, id);
+
+create or replace function public.linkedin_results_touch_updated_at() returns trigger
+language plpgsql
+as $$
+begin
+  new.updated_at := now();
+  return new;
+end;
+$$;
+
+drop trigger if exists linkedin_results_updated_at on public.linkedin_results;
+create trigger linkedin_results_updated_at
+  before update on public.linkedin_results
+  for each row execute function public.linkedin_results_touch_updated_at();
+
+-- Casi duplicados (jobson/similarity.py): SimHash de 64 bits y grupo al que pertenece el registro.
+-- Un índice por banda de 16 bits, solo sobre los líderes de grupo (las filas contra las que se
+-- compara); la expresión debe coincidir con BAND_EXPRESSIONS y el nombre lleva SIMHASH_LAYOUT.
+-- Con simhash del formato anterior (shingles de 3 palabras), correr `python3 main.py --reenrich`
+-- para recalcularlos y rearmar los grupos.
+alter table public.linkedin_results add column if not exists simhash bigint;
+alter table public.linkedin_results add column if not exists cluster_id text;
+
+drop index if exists public.idx_linkedin_results_simhash_b0;
+drop index if exists public.idx_linkedin_results_simhash_b1;
+drop index if exists public.idx_linkedin_results_simhash_b2;
+drop index if exists public.idx_linkedin_results_simhash_b3;
+drop index if exists public.idx_linkedin_results_simhash_leader_b0;
+drop index if exists public.idx_linkedin_results_simhash_leader_b1;
+drop index if exists public.idx_linkedin_results_simhash_leader_b2;
+drop index if exists public.idx_linkedin_results_simhash_leader_b3;
+drop index if exists public.idx_linkedin_results_simhash_s2b8_b0;
+drop index if exists public.idx_linkedin_results_simhash_s2b8_b1;
+drop index if exists public.idx_linkedin_results_simhash_s2b8_b2;
+drop index if exists public.idx_linkedin_results_simhash_s2b8_b3;
+drop index if exists public.idx_linkedin_results_simhash_s2b8_b4;
+drop index if exists public.idx_linkedin_results_simhash_s2b8_b5;
+drop index if exists public.idx_linkedin_results_simhash_s2b8_b6;
+drop index if exists public.idx_linkedin_results_simhash_s2b8_b7;
+create index if not exists idx_linkedin_results_simhash_s2b16_b0
+  on public.linkedin_results (source_type, ((simhash >> 48) & 65535))
+  where simhash is not null and cluster_id = dedupe_key;
+create index if not exists idx_linkedin_results_simhash_s2b16_b1
+  on public.linkedin_results (source_type, ((simhash >> 32) & 65535))
+  where simhash is not null and cluster_id = dedupe_key;
+create index if not exists idx_linkedin_results_simhash_s2b16_b2
+  on public.linkedin_results (source_type, ((simhash >> 16) & 65535))
+  where simhash is not null and cluster_id = dedupe_key;
+create index if not exists idx_linkedin_results_simhash_s2b16_b3
+  on public.linkedin_results (source_type, ((simhash >> 0) & 65535))
+  where simhash is not null and cluster_id = dedupe_key;
+create index if not exists idx_linkedin_results_cluster
+  on public.linkedin_results (cluster_id);
+create index if not exists idx_linkedin_results_cluster_pending
+  on public.linkedin_results (scraped_at, id)
+  where cluster_id is null;
+
+-- Un registro por grupo (el más reciente) con el tamaño del grupo (POST /rest/v1/rpc/linkedin_results_collapsed).
+-- Mismos filtros que linkedin_results_facets, aplicados antes de agrupar: el representante y
+-- cluster_size salen solo de las filas que pasan los filtros, como en SQLite. p_after_scraped_at y
+-- p_after_id paginan por (scraped_at, id) del representante. Devuelve un arreglo JSON de filas.
+-- Sin ventana sobre toda la tabla: se recorre (scraped_at, id) desde el cursor y una fila es
+-- representante si ninguna fila más reciente de su grupo pasa los filtros (búsqueda por el índice
+-- de grupo). Cada página cuesta lo que las filas que recorre, no lo que mide el resultado completo.
+drop view if exists public.linkedin_results_collapsed;
+
+create index if not exists idx_linkedin_results_scraped_at_id
+  on public.linkedin_results (scraped_at desc, id desc);
+
+create index if not exists idx_linkedin_results_group
+  on public.linkedin_results ((coalesce(cluster_id, dedupe_key)), scraped_at desc, id desc);
+
+create or replace function public.linkedin_results_collapsed(
+  p_source_type text default null,
+  p_search text default null,
+  p_seniority text default null,
+  p_apply_type text default null,
+  p_keyword text default null,
+  p_company text default null,
+  p_since timestamptz default null,
+  p_before timestamptz default null,
+  p_after_scraped_at timestamptz default null,
+  p_after_id uuid default null,
+  p_limit int default 200,
+  p_offset int default 0
+) returns jsonb
+language plpgsql
+stable
+as $$
+declare
+  -- Sin alias: dentro de cada subconsulta las columnas se resuelven contra la fila de esa subconsulta.
+  filter_sql text := '($1 is null or source_type = $1)'
+    || ' and ($2 is null or title ilike ''%'' || $2 || ''%'' or company ilike ''%'' || $2 || ''%'''
+    || ' or author ilike ''%'' || $2 || ''%'' or summary ilike ''%'' || $2 || ''%'''
+    || ' or content ilike ''%'' || $2 || ''%'')'
+    || ' and ($3 is null or seniority = $3) and ($4 is null or apply_type = $4)'
+    || ' and ($5 is null or keyword = $5) and ($6 is null or company = $6)'
+    || ' and ($7 is null or scraped_at >= $7) and ($8 is null or scraped_at < $8)';
+  result jsonb;
+begin
+  execute format(
+    'select coalesce(jsonb_agg(to_jsonb(g) order by g.scraped_at desc, g.id desc), ''[]''::jsonb) from ('
+    ' select r.*, (select count(*) from public.linkedin_results o'
+    '   where coalesce(o.cluster_id, o.dedupe_key) = coalesce(r.cluster_id, r.dedupe_key) and %1$s) as cluster_size'
+    ' from public.linkedin_results r'
+    ' where %1$s'
+    '   and ($9 is null or (r.scraped_at, r.id) < ($9, $10))'
+    '   and not exists (select 1 from public.linkedin_results o'
+    '     where coalesce(o.cluster_id, o.dedupe_key) = coalesce(r.cluster_id, r.dedupe_key)'
+    '       and (o.scraped_at, o.id) > (r.scraped_at, r.id) and %1$s)'
+    ' order by r.scraped_at desc, r.id desc'
+    ' limit $11 offset $12) g',
+    filter_sql
+  ) into result
+    using p_source_type, p_search, p_seniority, p_apply_type, p_keyword, p_company, p_since, p_before,
+      p_after_scraped_at, p_after_id, least(greatest(p_limit, 1), 1000), greatest(p_offset, 0);
+  return result;
+end;
+$$;
+
+-- Cada vez que una búsqueda ve un registro: (registro, palabra clave, modo, fecha).
+create table if not exists public.linkedin_keyword_hits (
+  id bigint generated always as identity primary key,
+  dedupe_key text not null,
+  keyword text not null,
+  search_mode text not null,
+  seen_at timestamptz not null,
+  unique (dedupe_key, keyword, search_mode, seen_at)
+);
+
+create index if not exists idx_linkedin_keyword_hits_keyword
+  on public.linkedin_keyword_hits (keyword, seen_at desc);
+
+-- Valor de una banda del simhash y sus 16 vecinos a un bit (multi-probe, ver jobson/similarity.py).
+create or replace function public.linkedin_results_band_probes(p_band bigint) returns bigint[]
+language sql
+immutable
+as $$
+  select array[p_band] || array(select p_band # (1::bigint << b) from generate_series(0, 15) b);
+$$;
+
+-- Agrupa casi duplicados (POST /rest/v1/rpc/linkedin_results_assign_clusters).
+-- A cada fila sin grupo le asigna el cluster_id de un líder de grupo con alguna banda del simhash
+-- igual o a un bit y distancia <= 7 bits, o su propio dedupe_key. Con p_keys solo mira esas filas;
+-- sin p_keys, hasta p_limit filas pendientes de toda la tabla. Devuelve cuántas agrupó.
+-- Cada fila hace 68 búsquedas en índice y compara contra unos 68 * L / 65536 líderes (L = líderes
+-- del mismo tipo). bit_count requiere Postgres 14 o posterior.
+create or replace function public.linkedin_results_assign_clusters(
+  p_keys text[] default null,
+  p_limit int default null
+) returns int
+language plpgsql
+as $$
+declare
+  assigned int := 0;
+  pending record;
+  match_cluster text;
+begin
+  -- De a una y en orden de llegada: los duplicados dentro del mismo lote también se agrupan.
+  for pending in
+    select t.dedupe_key, t.source_type, t.simhash
+    from public.linkedin_results t
+    where t.cluster_id is null
+      and (p_keys is null or t.dedupe_key = any(p_keys))
+    order by t.scraped_at, t.id
+    limit p_limit
+  loop
+    match_cluster := null;
+    if pending.simhash is not null then
+      -- union all y no or: así cada banda se resuelve con su índice (source_type, banda).
+      select c.cluster_id into match_cluster
+      from (
+        select cluster_id, simhash from public.linkedin_results
+        where source_type = pending.source_type and simhash is not null and cluster_id = dedupe_key
+          and ((simhash >> 48) & 65535) = any(public.linkedin_results_band_probes((pending.simhash >> 48) & 65535))
+        union all
+        select cluster_id, simhash from public.linkedin_results
+        where source_type = pending.source_type and simhash is not null and cluster_id = dedupe_key
+          and ((simhash >> 32) & 65535) = any(public.linkedin_results_band_probes((pending.simhash >> 32) & 65535))
+        union all
+        select cluster_id, simhash from public.linkedin_results
+        where source_type = pending.source_type and simhash is not null and cluster_id = dedupe_key
+          and ((simhash >> 16) & 65535) = any(public.linkedin_results_band_probes((pending.simhash >> 16) & 65535))
+        union all
+        select cluster_id, simhash from public.linkedin_results
+        where source_type = pending.source_type and simhash is not null and cluster_id = dedupe_key
+          and ((simhash >> 0) & 65535) = any(public.linkedin_results_band_probes((pending.simhash >> 0) & 65535))
+      ) c
+      where bit_count((c.simhash # pending.simhash)::bit(64)) <= 7
+      order by bit_count((c.simhash # pending.simhash)::bit(64))
+      limit 1;
+    end if;
+
+    update public.linkedin_results
+    set cluster_id = coalesce(match_cluster, pending.dedupe_key)
+    where dedupe_key = pending.dedupe_key;
+    assigned := assigned + 1;
+  end loop;
+
+  return assigned;
+end;
+$$;
+
+-- Guarda simhash recalculados y deja esas filas sin grupo (POST /rest/v1/rpc/linkedin_results_set_simhash).
+-- Lo usa --reenrich al cambiar el formato del SimHash; después se reagrupa con assign_clusters.
+create or replace function public.linkedin_results_set_simhash(p_rows jsonb) returns int
+language plpgsql
+as $$
+declare
+  changed int := 0;
+begin
+  update public.linkedin_results t set
+    simhash = i.simhash,
+    cluster_id = null
+  from jsonb_to_recordset(p_rows) as i(dedupe_key text, simhash bigint)
+  where t.dedupe_key = i.dedupe_key;
+  get diagnostics changed = row_count;
+  return changed;
+end;
+$$;
+
+-- Ingesta por lotes (POST /rest/v1/rpc/linkedin_results_ingest).
+-- Inserta los registros nuevos, reescribe solo los que cambiaron de content_hash (sin tocar
+-- keyword/search_mode), adelanta last_seen_at de los demás y registra los hits. Si p_hits es
+-- null, los hits salen de p_rows. Las filas del lote sin grupo pasan por linkedin_results_assign_clusters.
+-- Devuelve {"inserted": n, "updated": n, "unchanged": n}.
+create or replace function public.linkedin_results_ingest(
+  p_rows jsonb,
+  p_hits jsonb default null
+) returns jsonb
+language plpgsql
+as $$
+declare
+  total int := jsonb_array_length(p_rows);
+  inserted int := 0;
+  updated int := 0;
+begin
+  -- Las filas que solo traen clave, hash y fecha (toques) nunca se insertan.
+  insert into public.linkedin_results (
+    source_type, source_id, title, company, author, summary, content, seniority, apply_type,
+    url, work_mode, location, salary_min, salary_max, salary_currency, tech_tags,
+    keyword, search_mode, scraped_at, last_seen_at, dedupe_key, content_hash, simhash
+  )
+  select
+    source_type, source_id, title, company, author, summary, content, seniority, apply_type,
+    url, work_mode, location, salary_min, salary_max, salary_currency, tech_tags,
+    keyword, search_mode, scraped_at, coalesce(last_seen_at, scraped_at), dedupe_key, content_hash, simhash
+  from jsonb_populate_recordset(null::public.linkedin_results, p_rows)
+  where source_type is not null
+  on conflict (dedupe_key) do nothing;
+  get diagnostics inserted = row_count;
+
+  update public.linkedin_results t set
+    source_type = i.source_type,
+    source_id = i.source_id,
+    title = i.title,
+    company = i.company,
+    author = i.author,
+    summary = i.summary,
+    content = i.content,
+    seniority = i.seniority,
+    apply_type = i.apply_type,
+    url = i.url,
+    work_mode = i.work_mode,
+    location = i.location,
+    salary_min = i.salary_min,
+    salary_max = i.salary_max,
+    salary_currency = i.salary_currency,
+    tech_tags = i.tech_tags,
+    scraped_at = i.scraped_at,
+    last_seen_at = coalesce(i.last_seen_at, i.scraped_at),
+    content_hash = i.content_hash,
+    simhash = i.simhash
+  from jsonb_populate_recordset(null::public.linkedin_results, p_rows) i
+  where t.dedupe_key = i.dedupe_key
+    and i.source_type is not null
+    and t.content_hash is distinct from i.content_hash;
+  get diagnostics updated = row_count;
+
+  update public.linkedin_results t set
+    last_seen_at = coalesce(i.last_seen_at, i.scraped_at)
+  from jsonb_populate_recordset(null::public.linkedin_results, p_rows) i
+  where t.dedupe_key = i.dedupe_key
+    and t.content_hash = i.content_hash
+    and (t.last_seen_at is null or t.last_seen_at < coalesce(i.last_seen_at, i.scraped_at));
+
+  perform public.linkedin_results_assign_clusters(
+    array(select dedupe_key from jsonb_populate_recordset(null::public.linkedin_results, p_rows))
+  );
+
+  if p_hits is null then
+    insert into public.linkedin_keyword_hits (dedupe_key, keyword, search_mode, seen_at)
+    select dedupe_key, keyword, search_mode, coalesce(last_seen_at, scraped_at)
+    from jsonb_populate_recordset(null::public.linkedin_results, p_rows)
+    where keyword is not null
+    on conflict do nothing;
+  else
+    insert into public.linkedin_keyword_hits (dedupe_key, keyword, search_mode, seen_at)
+    select dedupe_key, keyword, search_mode, seen_at
+    from jsonb_to_recordset(p_hits) as h(dedupe_key text, keyword text, search_mode text, seen_at timestamptz)
+    on conflict do nothing;
+  end if;
+
+  return jsonb_build_object('inserted', inserted, 'updated', updated, 'unchanged', total - inserted - updated);
+end;
+$$;
 
 -- Si tienes RLS activado, crea políticas para permitir insertar/leer con tu key.
 -- Ejemplo mínimo (solo para pruebas privadas):
@@ -31,3 +458,6 @@ create index if not exists idx_linkedin_results_source_type
 -- create policy "allow read" on public.linkedin_results for select using (true);
 -- create policy "allow insert" on public.linkedin_results for insert with check (true);
 -- create policy "allow update" on public.linkedin_results for update using (true);
+-- alter table public.linkedin_keyword_hits enable row level security;
+-- create policy "allow read" on public.linkedin_keyword_hits for select using (true);
+-- create policy "allow insert" on public.linkedin_keyword_hits for insert with check (true);